@@ -0,0 +1,306 @@
+# coding: utf8
+
+"""
+Benchmarks of BulStem: loading the rules, stem() latency and end-to-end throughput.
+
+The corpus is synthetic, but reproducible: words are built from random prefixes and the suffixes of the bundled rules,
+sampled proportionally to the rules' frequencies.
+
+    python benchmarks/run.py                    # prints the results
+    python benchmarks/run.py --save             # stores them as the baseline
+    python benchmarks/run.py --compare          # fails if a result regressed compared to the baseline
+
+Timings depend on the machine, so the baseline should be re-generated when the machine changes.
+"""
+
+import argparse
+import json
+import pathlib
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from bulstem import index  # noqa: E402 pylint: disable=wrong-import-position
+from bulstem.stem import BulStemmer  # noqa: E402 pylint: disable=wrong-import-position
+
+BASELINE_PATH = pathlib.Path(__file__).resolve().parent / "baseline.json"
+
+MIN_FREQS = (1, 2, 5)
+SEED = 42
+CORPUS_TOKENS = 100000
+REPEAT = 5
+
+PREFIX_CHARS = "бвгдзклмнпрстх"
+VOWELS = "аеиоу"
+
+
+def synthetic_document(tokens, seed: int = SEED) -> str:
+    """
+    Joins tokens into a reproducible document, with punctuation, numbers and line breaks between them.
+
+    :param tokens: List[string], the tokens.
+    :param seed: (Optional) int, seed of the random generator.
+
+    :return: string, the document.
+    """
+    rng = random.Random(seed)
+    separators = [" "] * 6 + [", ", ". ", " 12 ", "\n"]
+    return "".join(token + rng.choice(separators) for token in tokens)
+
+
+def synthetic_corpus(rules_path: str, size: int, seed: int = SEED):
+    """
+    Generates a reproducible corpus, from the suffixes of the rules, weighted by their frequency.
+
+    :param rules_path: string, path (or pre-defined name) to the stemrules file.
+    :param size: int, number of tokens.
+    :param seed: (Optional) int, seed of the random generator.
+
+    :return: List[string], the tokens.
+    """
+    suffixes = []
+    weights = []
+    with open(
+        BulStemmer.resolve_path(rules_path), "r", encoding="utf-8"
+    ) as rules_stream:
+        for line in rules_stream:
+            m = BulStemmer.RULES_PATTERN.match(line.strip())
+            if m:
+                suffixes.append(m.group(1))
+                weights.append(int(m.group(3)))
+
+    rng = random.Random(seed)
+    vocabulary = []
+    for suffix in rng.choices(suffixes, weights, k=size // 10):
+        prefix = "".join(
+            rng.choice(PREFIX_CHARS) + rng.choice(VOWELS)
+            for _ in range(rng.randint(0, 2))
+        )
+        vocabulary.append(prefix + suffix)
+
+    # Zipf-like distribution of the tokens in the corpus.
+    ranks = [1.0 / rank for rank in range(1, len(vocabulary) + 1)]
+    return rng.choices(vocabulary, ranks, k=size)
+
+
+def measure(func, repeat: int = REPEAT):
+    """
+    Measures the best wall time, and the peak of the traced memory of a function.
+
+    :return: tuple, (seconds, peak bytes, the result of the last call).
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return best, peak, result
+
+
+def bench_loading(rules: str, results: dict):
+    rules_path = BulStemmer.resolve_path(rules)
+
+    def parse(min_freq):
+        with open(rules_path, "r", encoding="utf-8") as rules_stream:
+            return BulStemmer(rules_stream, min_freq)
+
+    for min_freq in MIN_FREQS:
+        seconds, peak, _ = measure(lambda: parse(min_freq))
+        results["load/{0}/min{1}/parse".format(rules, min_freq)] = {
+            "seconds": seconds,
+            "peak_bytes": peak,
+        }
+
+    index_path = index.default_index_path(rules_path, 2)
+    if index_path.is_file():
+        for memory_map in (False, True):
+            seconds, peak, _ = measure(
+                lambda: BulStemmer.from_index(
+                    index_path, rules_path, memory_map=memory_map
+                )
+            )
+            name = "mmap" if memory_map else "index"
+            results["load/{0}/min2/{1}".format(rules, name)] = {
+                "seconds": seconds,
+                "peak_bytes": peak,
+            }
+
+
+def bench_stemming(rules: str, left_context: int, results: dict):
+    stemmer = BulStemmer.from_file(rules, min_freq=2, left_context=left_context)
+    tokens = synthetic_corpus(rules, CORPUS_TOKENS)
+    text = " ".join(tokens)
+
+    stem = stemmer.stem
+    perf_counter = time.perf_counter
+    latencies = []
+    for token in tokens:
+        start = perf_counter()
+        stem(token)
+        latencies.append(perf_counter() - start)
+
+    latencies.sort()
+    results["stem/{0}/latency".format(rules)] = {
+        "mean": statistics.mean(latencies),
+        "p50": latencies[len(latencies) // 2],
+        "p90": latencies[int(len(latencies) * 0.9)],
+        "p99": latencies[int(len(latencies) * 0.99)],
+    }
+
+    for name, func in (
+        ("stem", lambda: [stem(token) for token in tokens]),
+        ("stem_many", lambda: stemmer.stem_many(tokens)),
+        ("stem_text", lambda: stemmer.stem_text(text)),
+    ):
+        seconds, _, _ = measure(func)
+        results["throughput/{0}/{1}".format(rules, name)] = {
+            "seconds": seconds,
+            "tokens_per_second": len(tokens) / seconds,
+        }
+
+
+def bench_backends(rules: str, left_context: int, results: dict) -> str:
+    """
+    Compares the lookup backends (see BulStemmer.BACKENDS) on the same corpus.
+
+    :return: string, name of the backend with the highest throughput.
+    """
+    rules_path = BulStemmer.resolve_path(rules)
+    tokens = synthetic_corpus(rules, CORPUS_TOKENS)
+
+    def parse(backend):
+        with open(rules_path, "r", encoding="utf-8") as rules_stream:
+            return BulStemmer(rules_stream, 2, left_context, backend=backend)
+
+    throughput = {}
+    for backend in BulStemmer.BACKENDS:
+        seconds, peak, stemmer = measure(lambda: parse(backend))
+        results["backend/{0}/{1}/load".format(rules, backend)] = {
+            "seconds": seconds,
+            "peak_bytes": peak,
+        }
+
+        stem = stemmer.stem
+        seconds, _, _ = measure(lambda: [stem(token) for token in tokens])
+        throughput[backend] = len(tokens) / seconds
+        results["backend/{0}/{1}/stem".format(rules, backend)] = {
+            "seconds": seconds,
+            "tokens_per_second": throughput[backend],
+        }
+
+    return max(throughput, key=throughput.get)
+
+
+def bench_documents(rules: str, left_context: int, results: dict):
+    stemmer = BulStemmer.from_file(rules, min_freq=2, left_context=left_context)
+    text = synthetic_document(synthetic_corpus(rules, CORPUS_TOKENS))
+    megabytes = len(text.encode("utf-8")) / 1e6
+
+    funcs = [("stem_spans", lambda: list(stemmer.stem_spans(text)))]
+    try:
+        import nltk
+
+        # The baseline: tokenize first, then stem each token.
+        stem = stemmer.stem
+        funcs.append(
+            ("nltk", lambda: [stem(token) for token in nltk.casual_tokenize(text)])
+        )
+    except ImportError:
+        pass
+
+    for name, func in funcs:
+        seconds, peak, _ = measure(func)
+        results["document/{0}/{1}".format(rules, name)] = {
+            "seconds": seconds,
+            "peak_bytes": peak,
+            "mb_per_second": megabytes / seconds,
+        }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Compares the results with the baseline, lower is better for all values, except for the throughputs (per second).
+
+    :return: List[string], descriptions of the regressions.
+    """
+    regressions = []
+    for name, values in sorted(results.items()):
+        for key, value in sorted(values.items()):
+            if name not in baseline or key not in baseline[name]:
+                continue
+
+            base = baseline[name][key]
+            if key.endswith("_per_second"):
+                regressed = value < base / (1 + tolerance)
+            else:
+                regressed = value > base * (1 + tolerance)
+
+            if regressed:
+                regressions.append(
+                    "{0} {1}: {2:.6g} (baseline {3:.6g})".format(name, key, value, base)
+                )
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Runs the BulStem benchmarks.")
+    parser.add_argument(
+        "--save", action="store_true", help="store the results as the baseline"
+    )
+    parser.add_argument(
+        "--compare", action="store_true", help="compare the results with the baseline"
+    )
+    parser.add_argument(
+        "--baseline", default=str(BASELINE_PATH), help="path of the baseline"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="allowed relative slowdown, when comparing",
+    )
+    args = parser.parse_args(argv)
+
+    results = {}
+    fastest = {}
+    for left_context, rules in enumerate(BulStemmer.RULES_PRE_DEF_PATH, start=1):
+        bench_loading(rules, results)
+        bench_stemming(rules, left_context, results)
+        fastest[rules] = bench_backends(rules, left_context, results)
+        bench_documents(rules, left_context, results)
+
+    for name, values in sorted(results.items()):
+        print(
+            name,
+            " ".join("{0}={1:.6g}".format(k, v) for (k, v) in sorted(values.items())),
+        )
+    for rules, backend in fastest.items():
+        print("fastest backend for {0}: {1}".format(rules, backend))
+
+    if args.save:
+        with open(args.baseline, "w", encoding="utf-8") as baseline_stream:
+            json.dump(results, baseline_stream, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.baseline, "r", encoding="utf-8") as baseline_stream:
+            regressions = compare(results, json.load(baseline_stream), args.tolerance)
+
+        for regression in regressions:
+            print("REGRESSION", regression)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+# coding: utf8
+
+"""
+Command line interface of BulStem, stems a text (or one token per line) streamed from files or the standard input.
+
+    python -m bulstem --rules stem-context-2 --left-context 2 < input.txt > output.txt
+"""
+
+import argparse
+import io
+import sys
+
+from bulstem.parallel import stem_corpus
+from bulstem.stem import BulStemmer
+
+BUFFER_SIZE = 1 << 20
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="bulstem",
+        description="Stems Bulgarian text, read line by line from files or the standard input.",
+    )
+    parser.add_argument(
+        "inputs",
+        nargs="*",
+        default=["-"],
+        help="input files, '-' is the standard input",
+    )
+    parser.add_argument("-o", "--output", default="-", help="output file")
+    parser.add_argument(
+        "-r",
+        "--rules",
+        default="stem-context-3",
+        help="path or pre-defined name ({0}) of the stemrules file".format(
+            ", ".join(BulStemmer.RULES_PRE_DEF_PATH)
+        ),
+    )
+    parser.add_argument(
+        "--rules-encoding", default="utf-8", help="encoding of the stemrules file"
+    )
+    parser.add_argument(
+        "--min-freq", type=int, default=2, help="minimum frequency of a rule"
+    )
+    parser.add_argument(
+        "--left-context",
+        type=int,
+        default=3,
+        help="size of the prefix which will not be stemmed",
+    )
+    parser.add_argument(
+        "--encoding", default="utf-8", help="encoding of the input and output"
+    )
+    parser.add_argument(
+        "--tokens",
+        action="store_true",
+        help="the input contains one token per line, instead of plain text",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="number of worker processes used for plain text",
+    )
+    parser.add_argument(
+        "--memory-map",
+        action="store_true",
+        help="look up the rules in the memory-mapped compiled index, if there is one",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=sorted(BulStemmer.BACKENDS),
+        default="trie",
+        help="lookup backend of the rules",
+    )
+    parser.add_argument(
+        "--lexicon",
+        help="lexicon of precomputed stems (see bulstem.lexicon), looked up before the rules",
+    )
+
+    return parser.parse_args(argv)
+
+
+def _open_output(path: str, encoding: str):
+    if path == "-":
+        return io.TextIOWrapper(sys.stdout.buffer, encoding=encoding, newline="")
+
+    return open(path, "w", encoding=encoding, buffering=BUFFER_SIZE, newline="")
+
+
+def _read_lines(paths, encoding: str):
+    for path in paths:
+        if path == "-":
+            input_stream = io.TextIOWrapper(sys.stdin.buffer, encoding=encoding)
+            try:
+                yield from input_stream
+            finally:
+                input_stream.detach()
+        else:
+            with open(
+                path, "r", encoding=encoding, buffering=BUFFER_SIZE
+            ) as input_stream:
+                yield from input_stream
+
+
+def _stem_tokens(stemmer: BulStemmer, lines):
+    for stem in stemmer.stem_iter(line.strip() for line in lines):
+        yield stem + "\n"
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+
+    stemmer = BulStemmer.from_file(
+        args.rules,
+        args.rules_encoding,
+        args.min_freq,
+        args.left_context,
+        memory_map=args.memory_map,
+        backend=args.backend,
+    )
+    if args.lexicon:
+        stemmer.use_lexicon(args.lexicon)
+
+    lines = _read_lines(args.inputs, args.encoding)
+    if args.tokens:
+        stems = _stem_tokens(stemmer, lines)
+    else:
+        stems = stem_corpus(stemmer, lines, workers=args.workers)
+
+    output_stream = _open_output(args.output, args.encoding)
+    try:
+        output_stream.writelines(stems)
+        output_stream.flush()
+    finally:
+        if args.output == "-":
+            output_stream.detach()
+        else:
+            output_stream.close()
+
+
+if __name__ == "__main__":
+    main()
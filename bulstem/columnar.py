@@ -0,0 +1,113 @@
+# coding: utf8
+
+"""
+Stemming of whole columns: NumPy arrays, Arrow arrays and pandas Series.
+
+Each column is factorized first, so only its distinct values are stemmed (in Python), and the stems are scattered back
+with vectorized operations. The stemmed Arrow arrays and pandas Series are dictionary-encoded (categorical), since
+the number of distinct stems is usually much lower than the number of rows.
+
+NumPy, pyarrow and pandas are optional, they are imported only when a column of theirs is stemmed.
+"""
+
+
+def stem_column(stemmer, column):
+    """
+    Stems a column of tokens, missing values are kept missing.
+
+    :param stemmer: BulStemmer, the stemmer.
+    :param column: numpy.ndarray, pyarrow.Array, pyarrow.ChunkedArray or pandas.Series of strings.
+
+    :return: a column of the same type with the stems, dictionary-encoded for Arrow, categorical for pandas.
+    :raises TypeError: if the type of the column is not supported.
+    """
+    module = type(column).__module__.split(".")[0]
+    if module == "pandas":
+        return _stem_pandas(stemmer, column)
+    if module == "pyarrow":
+        return _stem_arrow(stemmer, column)
+    if module == "numpy":
+        return _stem_numpy(stemmer, column)
+
+    raise TypeError("Unsupported column type '{0}'".format(type(column).__name__))
+
+
+def _stem_numpy(stemmer, column):
+    import numpy as np
+
+    if column.dtype.kind not in ("U", "O"):
+        raise TypeError("Unsupported column dtype '{0}'".format(column.dtype))
+
+    if column.dtype.kind == "U":
+        uniques, inverse = np.unique(column, return_inverse=True)
+        stems = np.array(stemmer.stem_many(uniques.tolist()), dtype=str)
+        return stems[inverse.reshape(column.shape)]
+
+    values = column.ravel()
+    # None (or NaN) marks the missing values, only the present ones are stemmed.
+    present = ~(np.equal(values, None) | (values != values))
+    codes, uniques = _factorize(values[present])
+    stems = np.array(stemmer.stem_many(uniques), dtype=object)
+
+    result = np.full(values.shape, None, dtype=object)
+    result[present] = stems[codes]
+    return result.reshape(column.shape)
+
+
+def _factorize(values):
+    # Sorting the objects (np.unique) compares them in Python, hashing them is much faster.
+    import numpy as np
+
+    try:
+        import pandas as pd
+    except ImportError:
+        pd = None
+
+    if pd is not None:
+        codes, uniques = pd.factorize(values)
+        return codes, uniques.tolist()
+
+    ids = {}
+    codes = np.fromiter(
+        (ids.setdefault(value, len(ids)) for value in values),
+        dtype=np.intp,
+        count=len(values),
+    )
+    return codes, list(ids)
+
+
+def _stem_arrow(stemmer, column):
+    import pyarrow as pa
+
+    if isinstance(column, pa.ChunkedArray):
+        return pa.chunked_array(
+            [_stem_arrow(stemmer, chunk) for chunk in column.chunks],
+            type=pa.dictionary(pa.int32(), pa.string()),
+        )
+
+    if not pa.types.is_dictionary(column.type):
+        column = column.dictionary_encode()
+
+    stems = pa.array(stemmer.stem_many(column.dictionary.to_pylist()), pa.string())
+    # Different tokens might have the same stem, hence the stems are encoded once again.
+    stems = stems.dictionary_encode()
+    indices = stems.indices.take(column.indices).cast(pa.int32())
+    return pa.DictionaryArray.from_arrays(indices, stems.dictionary)
+
+
+def _stem_pandas(stemmer, column):
+    import numpy as np
+    import pandas as pd
+
+    codes, uniques = pd.factorize(column)
+    stems = np.array(stemmer.stem_many(list(uniques)), dtype=object)
+    stem_codes, stems = pd.factorize(stems)
+    if len(stem_codes):
+        # -1 marks the missing values
+        codes = np.where(codes >= 0, stem_codes[codes], -1)
+
+    return pd.Series(
+        pd.Categorical.from_codes(codes, categories=stems),
+        index=column.index,
+        name=column.name,
+    )
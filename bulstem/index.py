@@ -0,0 +1,606 @@
+# coding: utf8
+
+"""
+Compiled binary index of BulStem rules.
+
+Parsing the text rules with ``BulStemmer.RULES_PATTERN`` is the most expensive part of constructing a stemmer. This
+module serializes an already filtered ``BulStemmer.SuffixTrie`` into a compact, flat binary file, which can be loaded
+back without touching the rules file again, except to validate its hash.
+
+The layout of the file (all integers are little-endian):
+
+    header          see ``HEADER``: magic, version, flags (see ``FLAG_ALLOW_DUPLICATES``), min_freq, sha256 of the
+                    rules file and the section sizes.
+    first_edge      uint32[nodes + 1], the edges of node ``i`` are ``first_edge[i]:first_edge[i + 1]``.
+    stem_id         uint32[nodes], index of the node's stem in the stem table (``0`` is the empty stem).
+    freq            uint32[nodes], frequency of the node's rule.
+    edge_char       uint32[nodes - 1], code point of each edge, sorted within a node.
+    alt_node        uint32[alternatives], nodes with duplicate rules shadowed by a later one, sorted.
+    alt_stem_id     uint32[alternatives], stems of the shadowed rules.
+    alt_freq        uint32[alternatives], frequencies of the shadowed rules, increasing within a node.
+    stem_offsets    uint32[stems + 1], offsets of each stem inside the stem blob.
+    stem_blob       utf-8 encoded stems.
+
+Nodes are numbered in breadth-first order, so the edge ``e`` always leads to the node ``e + 1``.
+
+``MappedSuffixTrie`` answers lookups directly from a memory-mapped index, hence all processes that load the same file
+share a single read-only copy of it in the page cache.
+"""
+
+import argparse
+import array
+import hashlib
+import mmap
+import os
+import pathlib
+import struct
+import sys
+import threading
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+INDEX_MAGIC = b"BSTI"
+INDEX_VERSION = 2
+INDEX_SUFFIX = ".idx"
+
+# magic, version, flags, min_freq, sha256, nodes, stems, alternatives, stem blob size
+HEADER = struct.Struct("<4sHHi32sIIII")
+# The rules were compiled with allow_duplicates, older indexes have all flags unset.
+FLAG_ALLOW_DUPLICATES = 1
+MAX_FREQ = 0xFFFFFFFF
+
+PathLike = Union[str, pathlib.Path]
+
+
+class TrieIndex(NamedTuple):
+    min_freq: int
+    digest: bytes
+    allow_duplicates: bool
+    first_edge: array.array
+    stem_id: array.array
+    freq: array.array
+    edge_chars: str
+    alt_node: array.array
+    alt_stem_id: array.array
+    alt_freq: array.array
+    stems: List[str]
+
+
+def file_digest(path: PathLike) -> bytes:
+    """
+    Computes the sha256 digest of a file.
+
+    :param path: string, path to the file.
+
+    :return: bytes, the raw sha256 digest.
+    """
+    sha = hashlib.sha256()
+    with open(str(path), "rb") as stream:
+        for chunk in iter(lambda: stream.read(1 << 20), b""):
+            sha.update(chunk)
+
+    return sha.digest()
+
+
+def default_index_path(rules_path: PathLike, min_freq: int) -> pathlib.Path:
+    """
+    Builds the path of the compiled index, placed next to the rules file.
+
+    :param rules_path: string, path to the stemrules file.
+    :param min_freq: int, the minimum frequency used when compiling the rules.
+
+    :return: pathlib.Path, e.g. stem_rules_context_1_utf8.min2.idx
+    """
+    rules_path = pathlib.Path(rules_path)
+    return rules_path.with_name(
+        "{0}.min{1}{2}".format(rules_path.stem, min_freq, INDEX_SUFFIX)
+    )
+
+
+@contextmanager
+def _replace_file(path: PathLike):
+    """
+    Opens a temporary file next to the path for writing, and moves it over the path once it is written. The processes
+    which memory-mapped the previous file keep reading it, since it is never truncated or rewritten in place.
+
+    :param path: string, path of the file to replace.
+
+    :return: the binary stream of the temporary file.
+    """
+    path = str(path)
+    tmp_path = "{0}.{1}-{2}.tmp".format(path, os.getpid(), threading.get_ident())
+    # Created like any other new file (0o666 and the umask), unlike tempfile.mkstemp, since the file is shared.
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(fd, "wb") as stream:
+            yield stream
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _uint32_array(values) -> array.array:
+    arr = array.array("I", values)
+    if sys.byteorder != "little":
+        arr.byteswap()
+
+    return arr
+
+
+def write_index(
+    root, path: PathLike, min_freq: int, digest: bytes, allow_duplicates: bool = False
+):
+    """
+    Writes a trie to a binary index file.
+
+    :param root: TrieNode, root of the trie, each node has ``chars``, ``stem``, ``freq`` and ``shadowed`` attributes.
+    :param path: string, output path.
+    :param min_freq: int, the minimum frequency used when filling the trie.
+    :param digest: bytes, sha256 digest of the rules file the trie was built from.
+    :param allow_duplicates: (Optional) bool, whether the trie was filled with allow_duplicates.
+    """
+    first_edge = [0]
+    stem_id = []
+    freqs = []
+    edge_chars = []
+    alternatives = ([], [], [])
+    stems = {"": 0}
+
+    queue = deque([root])
+    while queue:
+        node = queue.popleft()
+        for c in sorted(node.chars):
+            edge_chars.append(c)
+            queue.append(node.chars[c])
+
+        for stem, freq in node.shadowed or ():
+            alternatives[0].append(len(stem_id))
+            alternatives[1].append(stems.setdefault(stem, len(stems)))
+            alternatives[2].append(min(freq, MAX_FREQ))
+
+        first_edge.append(len(edge_chars))
+        stem_id.append(stems.setdefault(node.stem, len(stems)))
+        freqs.append(min(node.freq, MAX_FREQ))
+
+    stem_offsets = [0]
+    stem_blob = bytearray()
+    for stem in sorted(stems, key=stems.get):
+        stem_blob += stem.encode("utf-8")
+        stem_offsets.append(len(stem_blob))
+
+    with _replace_file(path) as stream:
+        stream.write(
+            HEADER.pack(
+                INDEX_MAGIC,
+                INDEX_VERSION,
+                FLAG_ALLOW_DUPLICATES if allow_duplicates else 0,
+                min_freq,
+                digest,
+                len(stem_id),
+                len(stems),
+                len(alternatives[0]),
+                len(stem_blob),
+            )
+        )
+        stream.write(_uint32_array(first_edge).tobytes())
+        stream.write(_uint32_array(stem_id).tobytes())
+        stream.write(_uint32_array(freqs).tobytes())
+        stream.write("".join(edge_chars).encode("utf-32-le"))
+        for section in alternatives:
+            stream.write(_uint32_array(section).tobytes())
+        stream.write(_uint32_array(stem_offsets).tobytes())
+        stream.write(bytes(stem_blob))
+
+
+def read_header(buffer) -> tuple:
+    """
+    Parses and validates the header of a binary index.
+
+    :param buffer: bytes-like, contents of the index file.
+
+    :return: tuple, (min_freq, digest, allow_duplicates, nodes, stems, alternatives, stem blob size).
+    :raises ValueError: if the buffer is not a supported index.
+    """
+    if len(buffer) < 8:
+        raise ValueError("Truncated index header")
+
+    magic, version = struct.unpack_from("<4sH", buffer)
+    if magic != INDEX_MAGIC:
+        raise ValueError("Not a BulStem index")
+    if version != INDEX_VERSION:
+        raise ValueError("Unsupported index version {0}".format(version))
+    if len(buffer) < HEADER.size:
+        raise ValueError("Truncated index header")
+
+    _, _, flags, min_freq, digest, nodes, stems, alternatives, blob_size = (
+        HEADER.unpack_from(buffer)
+    )
+    expected = HEADER.size + 4 * (4 * nodes + 3 * alternatives + stems + 1) + blob_size
+    if len(buffer) != expected:
+        raise ValueError(
+            "Corrupted index, expected {0} bytes, got {1}".format(expected, len(buffer))
+        )
+
+    allow_duplicates = bool(flags & FLAG_ALLOW_DUPLICATES)
+    return min_freq, digest, allow_duplicates, nodes, stems, alternatives, blob_size
+
+
+def read_index(
+    path: PathLike,
+    digest: Optional[bytes] = None,
+    allow_duplicates: Optional[bool] = None,
+) -> TrieIndex:
+    """
+    Reads a binary index file.
+
+    :param path: string, path to the index.
+    :param digest: (Optional) bytes, expected sha256 digest of the rules file.
+    :param allow_duplicates: (Optional) bool, allow_duplicates of the caller, if false the index must have been
+                             compiled without it.
+
+    :return: TrieIndex, the decoded sections of the index.
+    :raises ValueError: if the file is not a valid index, or it was built from a different rules file, or with
+                        allow_duplicates while the caller does not allow them.
+    """
+    with open(str(path), "rb") as stream:
+        buffer = stream.read()
+
+    (
+        min_freq,
+        index_digest,
+        index_allow_duplicates,
+        nodes,
+        stems,
+        alternatives,
+        _,
+    ) = read_header(buffer)
+    if digest is not None and digest != index_digest:
+        raise ValueError("Index '{0}' is out of date with its rules file".format(path))
+    _check_allow_duplicates(path, allow_duplicates, index_allow_duplicates)
+
+    offset = HEADER.size
+
+    def take(count: int) -> array.array:
+        nonlocal offset
+        arr = _uint32_array([])
+        arr.frombytes(buffer[offset : offset + 4 * count])
+        if sys.byteorder != "little":
+            arr.byteswap()
+        offset += 4 * count
+        return arr
+
+    first_edge = take(nodes + 1)
+    stem_id = take(nodes)
+    freq = take(nodes)
+    edge_chars = buffer[offset : offset + 4 * (nodes - 1)].decode("utf-32-le")
+    offset += 4 * (nodes - 1)
+    alt_node = take(alternatives)
+    alt_stem_id = take(alternatives)
+    alt_freq = take(alternatives)
+    stem_offsets = take(stems + 1)
+    blob = buffer[offset:]
+    stem_list = [
+        blob[stem_offsets[i] : stem_offsets[i + 1]].decode("utf-8")
+        for i in range(stems)
+    ]
+
+    return TrieIndex(
+        min_freq,
+        index_digest,
+        index_allow_duplicates,
+        first_edge,
+        stem_id,
+        freq,
+        edge_chars,
+        alt_node,
+        alt_stem_id,
+        alt_freq,
+        stem_list,
+    )
+
+
+def build_trie(index: TrieIndex, node_factory: Callable):
+    """
+    Re-creates the trie nodes from a decoded index.
+
+    :param index: TrieIndex, the decoded index.
+    :param node_factory: callable, creates an empty node with ``chars``, ``stem``, ``freq`` and ``shadowed``
+                         attributes.
+
+    :return: the root node.
+    """
+    first_edge = index.first_edge
+    edge_chars = index.edge_chars
+    stems = index.stems
+
+    nodes = [node_factory() for _ in range(len(index.stem_id))]
+    for i, (node, sid) in enumerate(zip(nodes, index.stem_id)):
+        lo, hi = first_edge[i], first_edge[i + 1]
+        if lo != hi:
+            node.chars = dict(zip(edge_chars[lo:hi], nodes[lo + 1 : hi + 1]))
+        if sid:
+            node.stem = stems[sid]
+            node.freq = index.freq[i]
+
+    for i, sid, freq in zip(index.alt_node, index.alt_stem_id, index.alt_freq):
+        if nodes[i].shadowed is None:
+            nodes[i].shadowed = []
+        nodes[i].shadowed.append((stems[sid], freq))
+
+    return nodes[0]
+
+
+def _check_allow_duplicates(
+    path: PathLike, expected: Optional[bool], allow_duplicates: bool
+):
+    # The rules compiled without allow_duplicates have no duplicates, hence they suit either caller.
+    if expected is False and allow_duplicates:
+        raise ValueError(
+            "Index '{0}' was compiled with allow_duplicates={1}".format(
+                path, allow_duplicates
+            )
+        )
+
+
+class MappedSuffixTrie:
+    def __init__(
+        self,
+        path: PathLike,
+        digest: Optional[bytes] = None,
+        allow_duplicates: Optional[bool] = None,
+    ):
+        """
+        Constructs MappedSuffixTrie from a memory-mapped index.
+
+        :param path: string, path to the index.
+        :param digest: (Optional) bytes, expected sha256 digest of the rules file.
+        :param allow_duplicates: (Optional) bool, allow_duplicates of the caller, if false the index must have been
+                                 compiled without it.
+
+        :raises ValueError: if the file is not a valid index, or it was built from a different rules file, or with
+                            allow_duplicates while the caller does not allow them.
+        """
+        if sys.byteorder != "little":
+            raise ValueError(
+                "Memory-mapped indexes are supported only on little-endian platforms"
+            )
+
+        self._path = str(path)
+        with open(self._path, "rb") as stream:
+            self._mmap = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+
+        buffer = memoryview(self._mmap)
+        (
+            self.min_freq,
+            self.digest,
+            self.allow_duplicates,
+            nodes,
+            stems,
+            alternatives,
+            _,
+        ) = read_header(buffer)
+        if digest is not None and digest != self.digest:
+            raise ValueError(
+                "Index '{0}' is out of date with its rules file".format(path)
+            )
+        _check_allow_duplicates(path, allow_duplicates, self.allow_duplicates)
+
+        offset = HEADER.size
+        sections = []
+        for count in (
+            (nodes + 1, nodes, nodes, nodes - 1) + (alternatives,) * 3 + (stems + 1,)
+        ):
+            sections.append(buffer[offset : offset + 4 * count].cast("I"))
+            offset += 4 * count
+
+        (
+            self._first_edge,
+            self._stem_id,
+            self._freq,
+            self._edge_char,
+            self._alt_node,
+            self._alt_stem_id,
+            self._alt_freq,
+            stem_offsets,
+        ) = sections
+        blob = bytes(buffer[offset:])
+        self._stems = [
+            blob[stem_offsets[i] : stem_offsets[i + 1]].decode("utf-8")
+            for i in range(stems)
+        ]
+
+    def __reduce__(self):
+        # Other processes map the same file instead of copying the trie.
+        return MappedSuffixTrie, (self._path,)
+
+    def get(self, word: str, vowel_idx: int, min_freq: Optional[int] = None) -> str:
+        """
+        Finds the longest possible rule from the end of the word, and appends it to the non-stemmed prefix.
+
+        :param word: string, original word, before stemming.
+        :param vowel_idx: int, position of the first vowel.
+        :param min_freq: (Optional) int, the minimum frequency of a rule, by default all rules in the index are used.
+
+        :return: string, lower-cased and stemmed version of the word.
+        """
+        if min_freq is not None:
+            idx, stem, _ = self.find(word, vowel_idx, min_freq)
+            word = word.lower()
+            return word[:idx] + stem
+
+        first_edge = self._first_edge
+        edge_char = self._edge_char
+        stem_id = self._stem_id
+
+        word = word.lower()
+        stem = ""
+        idx = len(word)
+        node = 0
+
+        for i in range(len(word) - 1, max(vowel_idx, 0) - 1, -1):
+            c = ord(word[i])
+            lo = first_edge[node]
+            hi = first_edge[node + 1]
+            e = bisect_left(edge_char, c, lo, hi)
+            if e == hi or edge_char[e] != c:
+                break
+
+            node = e + 1
+            if stem_id[node]:
+                stem = self._stems[stem_id[node]]
+                idx = i
+
+        return word[:idx] + stem
+
+    def find(self, word: str, vowel_idx: int, min_freq: Optional[int] = None) -> tuple:
+        """
+        Finds the longest possible rule from the end of the word, same as get, but returns the match.
+
+        :param word: string, original word, before stemming.
+        :param vowel_idx: int, position of the first vowel.
+        :param min_freq: (Optional) int, the minimum frequency of a rule, by default all rules in the index are used.
+
+        :return: tuple, (start of the matched suffix, its stem, depth reached in the trie).
+        """
+        first_edge = self._first_edge
+        edge_char = self._edge_char
+        stem_id = self._stem_id
+
+        word = word.lower()
+        stem = ""
+        idx = len(word)
+        depth = 0
+        node = 0
+
+        for i in range(len(word) - 1, max(vowel_idx, 0) - 1, -1):
+            c = ord(word[i])
+            lo = first_edge[node]
+            hi = first_edge[node + 1]
+            e = bisect_left(edge_char, c, lo, hi)
+            if e == hi or edge_char[e] != c:
+                break
+
+            node = e + 1
+            depth += 1
+            if stem_id[node]:
+                node_stem = self._node_stem(node, min_freq)
+                if node_stem:
+                    stem = node_stem
+                    idx = i
+
+        return idx, stem, depth
+
+    def rules(self) -> Iterator[Tuple[str, str, int]]:
+        """
+        Iterates over the rules of the index, the shadowed duplicates come before the rule replacing them.
+
+        :return: Iterator[tuple], (word, stem, freq) of each rule.
+        """
+        first_edge = self._first_edge
+        edge_char = self._edge_char
+        stem_id = self._stem_id
+
+        alternatives = {}
+        for node, sid, freq in zip(self._alt_node, self._alt_stem_id, self._alt_freq):
+            alternatives.setdefault(node, []).append((self._stems[sid], freq))
+
+        # The nodes are numbered in breadth-first order, so each word is known before the words of its children.
+        words = [""] * len(stem_id)
+        for node in range(len(stem_id)):
+            for e in range(first_edge[node], first_edge[node + 1]):
+                words[e + 1] = chr(edge_char[e]) + words[node]
+
+            if stem_id[node]:
+                for stem, freq in reversed(alternatives.get(node, ())):
+                    yield words[node], stem, freq
+                yield words[node], self._stems[stem_id[node]], self._freq[node]
+
+    def _node_stem(self, node: int, min_freq: Optional[int]) -> str:
+        if min_freq is None or self._freq[node] >= min_freq:
+            return self._stems[self._stem_id[node]]
+
+        # The rules shadowed by a later duplicate are still used for higher frequencies.
+        alt_node = self._alt_node
+        i = bisect_left(alt_node, node)
+        while i < len(alt_node) and alt_node[i] == node:
+            if self._alt_freq[i] >= min_freq:
+                return self._stems[self._alt_stem_id[i]]
+            i += 1
+
+        return ""
+
+
+def compile_rules(
+    path: str,
+    output: Optional[PathLike] = None,
+    encoding: str = "utf-8",
+    min_freq: int = 2,
+    allow_duplicates: bool = False,
+) -> pathlib.Path:
+    """
+    Compiles a stemrules file into a binary index.
+
+    :param path: string, path (or pre-defined name) of the stemrules file formatted: word ==> stem freq.
+    :param output: (Optional) string, path of the index, by default it is placed next to the rules file.
+    :param encoding: (Optional) string, encoding of the stemrules file
+    :param min_freq: (Optional) int, the minimum frequency of a rule to be used when stemming.
+    :param allow_duplicates: (Optional) bool, if false it raises ValueError exception when duplicates are found.
+
+    :return: pathlib.Path, path of the written index.
+    :raises ValueError: if duplicates are found in the fields.
+    """
+    from bulstem.stem import BulStemmer
+
+    rules_path = BulStemmer.resolve_path(path)
+    if output is None:
+        output = default_index_path(rules_path, min_freq)
+
+    with open(rules_path, "r", encoding=encoding) as rules_stream:
+        stemmer = BulStemmer(rules_stream, min_freq, allow_duplicates=allow_duplicates)
+
+    write_index(
+        stemmer._stem_rules._root,
+        output,
+        min_freq,
+        file_digest(rules_path),
+        allow_duplicates,
+    )
+    return pathlib.Path(output)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compiles BulStem rules into a binary index."
+    )
+    parser.add_argument(
+        "rules", nargs="+", help="path or pre-defined name of the stemrules file"
+    )
+    parser.add_argument(
+        "-o", "--output", help="path of the index (only with a single rules file)"
+    )
+    parser.add_argument(
+        "--encoding", default="utf-8", help="encoding of the stemrules file"
+    )
+    parser.add_argument(
+        "--min-freq", type=int, default=2, help="minimum frequency of a rule"
+    )
+    parser.add_argument(
+        "--allow-duplicates", action="store_true", help="allow duplicate rules"
+    )
+    args = parser.parse_args(argv)
+
+    if args.output and len(args.rules) > 1:
+        parser.error("--output can be used only with a single rules file")
+
+    for rules in args.rules:
+        output = compile_rules(
+            rules, args.output, args.encoding, args.min_freq, args.allow_duplicates
+        )
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
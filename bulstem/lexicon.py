@@ -0,0 +1,282 @@
+# coding: utf8
+
+"""
+Precomputed lexicon of stems, for a known vocabulary.
+
+A lexicon maps each (lower-cased) word of a word list to its stem, as computed once, offline, by a configured
+BulStemmer. A stemmer using the lexicon (see ``BulStemmer.use_lexicon``) answers the known words with a single hash
+table probe, and falls back to the rules for the rest.
+
+The layout of the file (all integers are little-endian):
+
+    header          see ``HEADER``: magic, version, min_freq, left_context and the sha256 of the rules of the stemmer
+                    (see ``BulStemmer.rules_digest``), and the section sizes.
+    slots           uint32[slots], open-addressing hash table (linear probing) of ``word id + 1``, ``0`` is empty.
+    word_offsets    uint32[words + 1], offsets of each word inside the word blob.
+    stem_id         uint32[words], index of the word's stem in the stem table.
+    stem_offsets    uint32[stems + 1], offsets of each stem inside the stem blob.
+    word_blob       utf-8 encoded words.
+    stem_blob       utf-8 encoded stems, each distinct stem is stored once.
+
+The slot of a word is ``crc32(utf-8 word) & (slots - 1)``, the number of slots is a power of two, at least twice the
+number of words. The lexicon is memory-mapped, and decodes only the stems it is asked for, so loading it takes the
+same time regardless of its size.
+
+    python -m bulstem.lexicon words.txt -o words.lex --rules stem-context-3 --left-context 3
+"""
+
+import argparse
+import mmap
+import pathlib
+import struct
+import sys
+import zlib
+from typing import Iterable, Optional, Union
+
+from bulstem.index import _replace_file, _uint32_array
+
+LEXICON_MAGIC = b"BSTL"
+LEXICON_VERSION = 2
+
+# magic, version, reserved, min_freq, left_context, sha256 of the rules, words, stems, slots, word and stem blob sizes
+HEADER = struct.Struct("<4sHHii32sIIIII")
+
+PathLike = Union[str, pathlib.Path]
+
+
+def write_lexicon(stemmer, words: Iterable[str], path: PathLike) -> int:
+    """
+    Stems a word list, and writes the words with their stems to a lexicon file.
+
+    :param stemmer: BulStemmer, the configured stemmer.
+    :param words: Iterable[string], the vocabulary, the words are lower-cased and deduplicated.
+    :param path: string, output path.
+
+    :return: int, the number of words in the lexicon.
+    :raises ValueError: if the lookup backend of the stemmer can't list its rules.
+    """
+    digest = stemmer.rules_digest()
+    words = list(dict.fromkeys(word.lower() for word in words if word))
+    stems = {}
+    stem_id = [stems.setdefault(stem, len(stems)) for stem in stemmer.stem_many(words)]
+
+    num_slots = 1
+    while num_slots < 2 * len(words):
+        num_slots <<= 1
+    mask = num_slots - 1
+
+    slots = [0] * num_slots
+    word_offsets = [0]
+    word_blob = bytearray()
+    for i, word in enumerate(words):
+        key = word.encode("utf-8")
+        word_blob += key
+        word_offsets.append(len(word_blob))
+
+        slot = zlib.crc32(key) & mask
+        while slots[slot]:
+            slot = (slot + 1) & mask
+        slots[slot] = i + 1
+
+    stem_offsets = [0]
+    stem_blob = bytearray()
+    for stem in stems:
+        stem_blob += stem.encode("utf-8")
+        stem_offsets.append(len(stem_blob))
+
+    # Replaced, rather than rewritten, since running stemmers might have the previous lexicon mapped.
+    with _replace_file(path) as stream:
+        stream.write(
+            HEADER.pack(
+                LEXICON_MAGIC,
+                LEXICON_VERSION,
+                0,
+                stemmer._min_freq,
+                stemmer._left_context,
+                digest,
+                len(words),
+                len(stems),
+                num_slots,
+                len(word_blob),
+                len(stem_blob),
+            )
+        )
+        for section in (slots, word_offsets, stem_id, stem_offsets):
+            stream.write(_uint32_array(section).tobytes())
+        stream.write(bytes(word_blob))
+        stream.write(bytes(stem_blob))
+
+    return len(words)
+
+
+class Lexicon:
+    def __init__(self, path: PathLike):
+        """
+        Constructs Lexicon from a memory-mapped lexicon file (see write_lexicon).
+
+        :param path: string, path to the lexicon.
+
+        :raises ValueError: if the file is not a valid lexicon.
+        """
+        if sys.byteorder != "little":
+            raise ValueError(
+                "Memory-mapped lexicons are supported only on little-endian platforms"
+            )
+
+        self._path = str(path)
+        with open(self._path, "rb") as stream:
+            self._mmap = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+
+        buffer = memoryview(self._mmap)
+        if len(buffer) < HEADER.size:
+            raise ValueError("Truncated lexicon header")
+
+        (
+            magic,
+            version,
+            _,
+            min_freq,
+            left_context,
+            digest,
+            words,
+            stems,
+            slots,
+            word_size,
+            stem_size,
+        ) = HEADER.unpack_from(buffer)
+        if magic != LEXICON_MAGIC:
+            raise ValueError("Not a BulStem lexicon")
+        if version != LEXICON_VERSION:
+            raise ValueError("Unsupported lexicon version {0}".format(version))
+
+        expected = (
+            HEADER.size + 4 * (slots + 2 * words + stems + 2) + word_size + stem_size
+        )
+        if len(buffer) != expected or slots & (slots - 1):
+            raise ValueError(
+                "Corrupted lexicon, expected {0} bytes, got {1}".format(
+                    expected, len(buffer)
+                )
+            )
+
+        self.min_freq = min_freq
+        self.left_context = left_context
+        self.digest = digest
+        self._size = words
+        self._mask = slots - 1
+
+        offset = HEADER.size
+        sections = []
+        for count in (slots, words + 1, words, stems + 1):
+            sections.append(buffer[offset : offset + 4 * count].cast("I"))
+            offset += 4 * count
+
+        self._slots, self._word_offsets, self._stem_id, self._stem_offsets = sections
+        self._word_blob = offset
+        self._stem_blob = offset + word_size
+
+    def __reduce__(self):
+        # Other processes map the same file instead of copying the lexicon.
+        return Lexicon, (self._path,)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, token: str) -> bool:
+        return self.get(token) is not None
+
+    def get(self, token: str) -> Optional[str]:
+        """
+        Looks up the stem of a token.
+
+        :param token: string, the token.
+
+        :return: string, the stem of the token, or None if it is not in the lexicon.
+        """
+        key = token.lower().encode("utf-8")
+        slots = self._slots
+        word_offsets = self._word_offsets
+        data = self._mmap
+        blob = self._word_blob
+
+        slot = zlib.crc32(key) & self._mask
+        while True:
+            word_id = slots[slot]
+            if not word_id:
+                return None
+
+            word_id -= 1
+            start = blob + word_offsets[word_id]
+            if data[start : blob + word_offsets[word_id + 1]] == key:
+                stem_id = self._stem_id[word_id]
+                start = self._stem_blob + self._stem_offsets[stem_id]
+                end = self._stem_blob + self._stem_offsets[stem_id + 1]
+                return data[start:end].decode("utf-8")
+
+            slot = (slot + 1) & self._mask
+
+
+def compile_lexicon(
+    words_path: str,
+    output: PathLike,
+    rules: str = "stem-context-3",
+    encoding: str = "utf-8",
+    min_freq: int = 2,
+    left_context: int = 3,
+) -> int:
+    """
+    Compiles a word list (one word per line) into a lexicon.
+
+    :param words_path: string, path to the word list.
+    :param output: string, path of the lexicon.
+    :param rules: (Optional) string, path (or pre-defined name) of the stemrules file.
+    :param encoding: (Optional) string, encoding of the word list.
+    :param min_freq: (Optional) int, the minimum frequency of a rule to be used when stemming.
+    :param left_context: (Optional) int, size of the prefix which will not be stemmed.
+
+    :return: int, the number of words in the lexicon.
+    """
+    from bulstem.stem import BulStemmer
+
+    stemmer = BulStemmer.from_file(rules, min_freq=min_freq, left_context=left_context)
+    with open(words_path, "r", encoding=encoding) as words_stream:
+        return write_lexicon(stemmer, (line.strip() for line in words_stream), output)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compiles a word list into a lexicon of precomputed BulStem stems."
+    )
+    parser.add_argument("words", help="word list, one word per line")
+    parser.add_argument("-o", "--output", required=True, help="path of the lexicon")
+    parser.add_argument(
+        "-r",
+        "--rules",
+        default="stem-context-3",
+        help="path or pre-defined name of the stemrules file",
+    )
+    parser.add_argument("--encoding", default="utf-8", help="encoding of the word list")
+    parser.add_argument(
+        "--min-freq", type=int, default=2, help="minimum frequency of a rule"
+    )
+    parser.add_argument(
+        "--left-context",
+        type=int,
+        default=3,
+        help="size of the prefix which will not be stemmed",
+    )
+    args = parser.parse_args(argv)
+
+    size = compile_lexicon(
+        args.words,
+        args.output,
+        args.rules,
+        args.encoding,
+        args.min_freq,
+        args.left_context,
+    )
+    print("{0}: {1} words".format(args.output, size))
+
+
+if __name__ == "__main__":
+    main()
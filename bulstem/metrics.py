@@ -0,0 +1,112 @@
+# coding: utf8
+
+"""
+Opt-in instrumentation of BulStemmer: loading of the rules and the lookups of the stemming rules.
+"""
+
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, Optional
+
+
+class StemmerMetrics:
+    def __init__(self, callback: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """
+        Constructs StemmerMetrics.
+
+        :param callback: (Optional) callable, receives the metrics as a dict, each time flush() is called.
+        """
+        self.callback = callback
+        self._lock = threading.Lock()
+
+        self.load_seconds = 0.0
+        self.lines_parsed = 0
+        self.rules_kept = 0
+        self.rules_dropped = 0
+        self.reset()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """
+        Resets the lookup metrics, the loading ones are kept.
+        """
+        with self._lock:
+            self.lookups = 0
+            self.matched = 0
+            self.unchanged = 0
+            self.depths = Counter()
+            self.rule_hits = Counter()
+
+    def record_load(
+        self, seconds: float, lines_parsed: int, rules_kept: int, rules_dropped: int
+    ):
+        """
+        Records the loading of the rules.
+
+        :param seconds: float, time spent loading the rules.
+        :param lines_parsed: int, number of lines read.
+        :param rules_kept: int, number of rules added to the trie.
+        :param rules_dropped: int, number of rules dropped, because of their frequency.
+        """
+        with self._lock:
+            self.load_seconds += seconds
+            self.lines_parsed += lines_parsed
+            self.rules_kept += rules_kept
+            self.rules_dropped += rules_dropped
+
+    def record_lookup(self, depth: int, rule: Optional[str]):
+        """
+        Records a single lookup of a token.
+
+        :param depth: int, depth reached in the trie.
+        :param rule: (Optional) string, the rule applied (formatted: suffix ==> stem), or None if the token is
+                     unchanged.
+        """
+        with self._lock:
+            self.lookups += 1
+            self.depths[depth] += 1
+            if rule is None:
+                self.unchanged += 1
+            else:
+                self.matched += 1
+                self.rule_hits[rule] += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Exports the metrics.
+
+        :return: dict, the loading and the lookup metrics, with the histograms of the depths and the rules hits.
+        """
+        with self._lock:
+            return {
+                "load_seconds": self.load_seconds,
+                "lines_parsed": self.lines_parsed,
+                "rules_kept": self.rules_kept,
+                "rules_dropped": self.rules_dropped,
+                "lookups": self.lookups,
+                "matched": self.matched,
+                "unchanged": self.unchanged,
+                "depths": dict(self.depths),
+                "rule_hits": dict(self.rule_hits),
+            }
+
+    def flush(self) -> Dict[str, Any]:
+        """
+        Exports the metrics to the callback (if any), and resets the lookup metrics.
+
+        :return: dict, the exported metrics.
+        """
+        metrics = self.to_dict()
+        self.reset()
+        if self.callback is not None:
+            self.callback(metrics)
+
+        return metrics
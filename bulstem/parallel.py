@@ -0,0 +1,126 @@
+# coding: utf8
+
+"""
+Stemming of large corpora, split into chunks of lines, in a pool of worker processes.
+
+Where the platform supports it the workers are forked, so they inherit the already constructed stemmer instead of
+reading the rules again (or unpickling them).
+"""
+
+import itertools
+import multiprocessing
+import time
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from bulstem.stem import BulStemmer
+
+_STEMMER = None
+
+
+def _init_worker(stemmer: BulStemmer):
+    global _STEMMER
+    _STEMMER = stemmer
+
+
+def _stem_chunk(lines: List[str]) -> Tuple[List[str], int]:
+    return _stem_lines(_STEMMER, lines)
+
+
+def _stem_lines(stemmer: BulStemmer, lines: List[str]) -> Tuple[List[str], int]:
+    stem = stemmer.stem
+    subn = BulStemmer.WORD_PATTERN.subn
+    stems = {}
+
+    def stem_match(m):
+        token = m.group()
+        try:
+            return stems[token]
+        except KeyError:
+            stems[token] = token_stem = stem(token)
+            return token_stem
+
+    stemmed = []
+    tokens = 0
+    for line in lines:
+        line, count = subn(stem_match, line)
+        stemmed.append(line)
+        tokens += count
+
+    return stemmed, tokens
+
+
+def _chunks(lines: Iterable[str], chunk_size: int) -> Iterator[List[str]]:
+    lines = iter(lines)
+    while True:
+        chunk = list(itertools.islice(lines, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _context():
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+
+    return multiprocessing.get_context()
+
+
+def stem_corpus(
+    stemmer: BulStemmer,
+    lines: Iterable[str],
+    workers: Optional[int] = None,
+    chunk_size: int = 1000,
+    stats: Optional[Dict[str, float]] = None,
+) -> Iterator[str]:
+    """
+    Stems every word of a corpus, in parallel, while the rest of the text is kept intact (see BulStemmer.stem_text).
+
+    The lines are read lazily and at most two chunks per worker are in flight, hence the memory used is bounded and
+    doesn't depend on the size of the corpus.
+
+    :param stemmer: BulStemmer, the stemmer, it is shared with the workers.
+    :param lines: Iterable[string], lines of the corpus, e.g. an open file.
+    :param workers: (Optional) int, number of worker processes, by default the number of CPUs. With a single worker
+                    the corpus is stemmed in the current process.
+    :param chunk_size: (Optional) int, number of lines sent to a worker at once.
+    :param stats: (Optional) dict, it is filled (and kept up to date, while stemming) with the number of lines,
+                  tokens, the elapsed seconds and tokens per second.
+
+    :return: Iterator[string], the stemmed lines, in the same order as the input.
+    """
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    if stats is None:
+        stats = {}
+
+    stats.update(lines=0, tokens=0, seconds=0.0, tokens_per_second=0.0)
+    start = time.perf_counter()
+
+    def update(stemmed: List[str], tokens: int):
+        stats["lines"] += len(stemmed)
+        stats["tokens"] += tokens
+        stats["seconds"] = time.perf_counter() - start
+        if stats["seconds"] > 0:
+            stats["tokens_per_second"] = stats["tokens"] / stats["seconds"]
+
+    if workers <= 1:
+        for chunk in _chunks(lines, chunk_size):
+            stemmed, tokens = _stem_lines(stemmer, chunk)
+            update(stemmed, tokens)
+            yield from stemmed
+        return
+
+    with _context().Pool(workers, _init_worker, (stemmer,)) as pool:
+        pending = deque()
+        for chunk in _chunks(lines, chunk_size):
+            pending.append(pool.apply_async(_stem_chunk, (chunk,)))
+            if len(pending) >= 2 * workers:
+                stemmed, tokens = pending.popleft().get()
+                update(stemmed, tokens)
+                yield from stemmed
+
+        while pending:
+            stemmed, tokens = pending.popleft().get()
+            update(stemmed, tokens)
+            yield from stemmed
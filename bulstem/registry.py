@@ -0,0 +1,142 @@
+# coding: utf8
+
+"""
+Process-wide registry of shared stemmers.
+
+Constructing a stemmer reads its rules file (or at least validates the compiled index against it), hence the libraries
+of a process which need the same stemmer should share a single instance of it. The registry constructs the stemmer of
+each configuration (rules, min_freq, left_context, allow_duplicates) lazily, on its first use, and hands the same
+instance to all callers. The shared stemmers are used concurrently, so they should not be changed (e.g. with
+update_rules), unless the change is meant for all callers.
+
+    from bulstem.registry import get_stemmer
+
+    stemmer = get_stemmer("stem-context-2", left_context=2)
+"""
+
+import threading
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+from bulstem.stem import BulStemmer
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+Key = Tuple[str, int, int, bool]
+
+_lock = threading.Lock()
+_stemmers: Dict[Key, BulStemmer] = {}
+# Locks of the configurations being constructed, so that each of them is constructed only once.
+_loading: Dict[Key, threading.Lock] = {}
+
+
+def get_stemmer(
+    rules: str = "stem-context-3",
+    min_freq: int = 2,
+    left_context: int = 3,
+    allow_duplicates: bool = False,
+) -> BulStemmer:
+    """
+    Returns the shared stemmer of a configuration, it is constructed (see BulStemmer.from_file) on the first call.
+
+    :param rules: (Optional) string, path or pre-defined name (see BulStemmer.RULES_PRE_DEF_PATH) of the stemrules.
+    :param min_freq: (Optional) int, the minimum frequency of a rule to be used when stemming.
+    :param left_context: (Optional) int, size of the prefix which will not be stemmed.
+    :param allow_duplicates: (Optional) bool, if false it raises ValueError exception when duplicates are found.
+
+    :return: BulStemmer, the shared stemmer.
+    :raises ValueError: if duplicates are found in the fields.
+    """
+    key = (
+        str(BulStemmer.resolve_path(rules)),
+        min_freq,
+        left_context,
+        allow_duplicates,
+    )
+    stemmer = _stemmers.get(key)
+    if stemmer is not None:
+        return stemmer
+
+    with _lock:
+        loading = _loading.setdefault(key, threading.Lock())
+
+    # Different configurations are constructed concurrently, while the callers of the same one wait for it.
+    try:
+        with loading:
+            stemmer = _stemmers.get(key)
+            if stemmer is None:
+                stemmer = BulStemmer.from_file(
+                    key[0],
+                    min_freq=min_freq,
+                    left_context=left_context,
+                    allow_duplicates=allow_duplicates,
+                )
+                with _lock:
+                    _stemmers[key] = stemmer
+    finally:
+        with _lock:
+            if _loading.get(key) is loading:
+                del _loading[key]
+
+    return stemmer
+
+
+def warm_up(
+    configs: Optional[Iterable[tuple]] = None, background: bool = False
+) -> Optional["Future"]:
+    """
+    Constructs the shared stemmers ahead of their first use, e.g. at the startup of a service.
+
+    :param configs: (Optional) Iterable[tuple], (rules, min_freq, left_context, allow_duplicates) of each stemmer,
+                    the trailing values can be omitted (see get_stemmer). By default, the pre-defined rule sets with
+                    the default settings of get_stemmer, so that get_stemmer("stem-context-2") finds its stemmer.
+    :param background: (Optional) bool, if true the stemmers are constructed in a background thread.
+
+    :return: concurrent.futures.Future, done once all stemmers are constructed, if background, else None.
+    :raises ValueError: if duplicates are found in the fields.
+    """
+    if configs is None:
+        configs = [(rules,) for rules in BulStemmer.RULES_PRE_DEF_PATH]
+    configs = [tuple(config) for config in configs]
+
+    if background:
+        from concurrent.futures import ThreadPoolExecutor
+
+        executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            return executor.submit(warm_up, configs)
+        finally:
+            executor.shutdown(wait=False)
+
+    for config in configs:
+        get_stemmer(*config)
+
+    return None
+
+
+def evict(rules: Optional[str] = None) -> int:
+    """
+    Drops the shared stemmers of a rule set, or all of them. The callers already holding a stemmer can keep using it,
+    while the next call of get_stemmer constructs a new one.
+
+    :param rules: (Optional) string, path or pre-defined name of the stemrules, by default all stemmers are dropped.
+
+    :return: int, the number of dropped stemmers.
+    """
+    path = None if rules is None else str(BulStemmer.resolve_path(rules))
+    with _lock:
+        keys = [key for key in list(_stemmers) if path is None or key[0] == path]
+        for key in keys:
+            del _stemmers[key]
+
+    return len(keys)
+
+
+def loaded() -> List[Key]:
+    """
+    Lists the configurations of the constructed stemmers.
+
+    :return: List[tuple], (path of the stemrules, min_freq, left_context, allow_duplicates) of each stemmer.
+    """
+    with _lock:
+        return sorted(_stemmers)
@@ -0,0 +1,477 @@
+# coding: utf8
+
+"""
+Asyncio stemming service, which shares a single BulStemmer between many clients, over a Unix socket or localhost TCP.
+
+The protocol is newline-delimited JSON. Each request is ``{"id": 1, "tokens": ["...", ...]}`` and it is answered with
+``{"id": 1, "stems": ["...", ...]}`` (or ``{"id": 1, "error": "..."}``). A client may send many requests without
+waiting for the responses (pipelining). Concurrent requests are coalesced into a single batch, and each distinct token
+in the batch is stemmed only once.
+
+    python -m bulstem.server --unix /tmp/bulstem.sock --rules stem-context-3
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+from typing import List, Optional
+
+from bulstem.stem import BulStemmer
+
+MAX_BATCH_TOKENS = 4096
+STREAM_LIMIT = 1 << 24
+
+
+class StemServer:
+    def __init__(self, stemmer: BulStemmer, max_batch_tokens: int = MAX_BATCH_TOKENS):
+        """
+        Constructs StemServer.
+
+        :param stemmer: BulStemmer, the stemmer shared by all clients.
+        :param max_batch_tokens: (Optional) int, coalescing of the pending requests stops after that many tokens.
+        """
+        self._stemmer = stemmer
+        self._max_batch_tokens = max_batch_tokens
+        self._queue = None
+        self._batcher = None
+        self._servers = []
+        self._writers = set()
+        self._closed = False
+
+    async def start_unix(self, path: str):
+        """
+        Starts serving on a Unix socket.
+
+        :param path: string, path of the socket.
+
+        :return: asyncio.AbstractServer, the started server.
+        """
+        self._closed = False
+        self._start_batcher()
+        server = await asyncio.start_unix_server(self._handle, path, limit=STREAM_LIMIT)
+        self._servers.append(server)
+        return server
+
+    async def start_tcp(self, host: str = "127.0.0.1", port: int = 0):
+        """
+        Starts serving on a TCP port, by default on a free port of the localhost.
+
+        :param host: (Optional) string, host to bind to.
+        :param port: (Optional) int, port to bind to.
+
+        :return: asyncio.AbstractServer, the started server.
+        """
+        self._closed = False
+        self._start_batcher()
+        server = await asyncio.start_server(
+            self._handle, host, port, limit=STREAM_LIMIT
+        )
+        self._servers.append(server)
+        return server
+
+    async def close(self):
+        """
+        Stops all servers, closes the connections of their clients, and stops the coalescing of requests. The pending
+        requests fail with ConnectionError.
+        """
+        self._closed = True
+        for server in self._servers:
+            server.close()
+        # The servers are done only once their connections are closed.
+        for writer in list(self._writers):
+            writer.close()
+        for server in self._servers:
+            await server.wait_closed()
+        self._servers = []
+
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+            self._batcher = None
+
+        error = ConnectionError("StemServer is closed")
+        while self._queue is not None and not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(error)
+
+    def _start_batcher(self):
+        if self._batcher is None:
+            self._queue = asyncio.Queue()
+            self._batcher = asyncio.ensure_future(self._run_batcher())
+
+    async def _run_batcher(self):
+        while True:
+            batch = [await self._queue.get()]
+            size = len(batch[0][0])
+            while size < self._max_batch_tokens and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                size += len(batch[-1][0])
+
+            try:
+                stems = self._stemmer.stem_many(
+                    itertools.chain.from_iterable(tokens for (tokens, _) in batch)
+                )
+            except Exception as e:  # pylint: disable=broad-except
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            offset = 0
+            for tokens, future in batch:
+                if not future.done():
+                    future.set_result(stems[offset : offset + len(tokens)])
+                offset += len(tokens)
+
+    async def stem_many(self, tokens: List[str]) -> List[str]:
+        """
+        Stems a batch of tokens, coalesced with the other pending requests.
+
+        :param tokens: List[string], tokens to be stemmed.
+
+        :return: List[string], stems of the tokens.
+        :raises ConnectionError: if the server is closed.
+        """
+        if self._closed:
+            raise ConnectionError("StemServer is closed")
+
+        self._start_batcher()
+        future = asyncio.get_event_loop().create_future()
+        await self._queue.put((tokens, future))
+        return await future
+
+    async def _respond(self, request: bytes, writer: asyncio.StreamWriter):
+        request_id = None
+        try:
+            message = json.loads(request.decode("utf-8"))
+            request_id = message.get("id")
+            tokens = message["tokens"]
+            if not isinstance(tokens, list) or not all(
+                isinstance(t, str) for t in tokens
+            ):
+                raise ValueError("'tokens' must be a list of strings")
+
+            response = {"id": request_id, "stems": await self.stem_many(tokens)}
+        except (ValueError, KeyError, AttributeError) as e:
+            response = {"id": request_id, "error": "Invalid request: {0}".format(e)}
+        except ConnectionError:
+            # The server is closed, along with the connection of the client.
+            return
+
+        writer.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        pending = set()
+        self._writers.add(writer)
+        try:
+            while True:
+                request = await reader.readline()
+                if not request:
+                    break
+                if not request.strip():
+                    continue
+
+                task = asyncio.ensure_future(self._respond(request, writer))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+
+                if writer.transport.get_write_buffer_size() > STREAM_LIMIT:
+                    await writer.drain()
+
+            if pending:
+                await asyncio.wait(pending)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for task in pending:
+                task.cancel()
+            self._writers.discard(writer)
+            writer.close()
+
+
+class _Connection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+        self._ids = itertools.count()
+        self._pending = {}
+        self._closed = False
+        self._receiver = asyncio.ensure_future(self._receive())
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    async def _receive(self):
+        error = ConnectionError("Connection to the stemming server is closed")
+        try:
+            while True:
+                response = await self._reader.readline()
+                if not response:
+                    break
+
+                message = json.loads(response.decode("utf-8"))
+                future = self._pending.pop(message["id"], None)
+                if future is None or future.cancelled():
+                    continue
+                if "error" in message:
+                    future.set_exception(ValueError(message["error"]))
+                else:
+                    future.set_result(message["stems"])
+        except ConnectionError as e:
+            error = e
+        finally:
+            self._closed = True
+            self._writer.close()
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            self._pending.clear()
+
+    async def request(self, tokens: List[str]) -> List[str]:
+        if self._closed:
+            raise ConnectionError("Connection to the stemming server is closed")
+
+        request_id = next(self._ids)
+        future = asyncio.get_event_loop().create_future()
+        self._pending[request_id] = future
+
+        message = {"id": request_id, "tokens": list(tokens)}
+        self._writer.write(
+            json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n"
+        )
+        try:
+            await self._writer.drain()
+        except ConnectionError:
+            # Unless the receiver already failed the request, it fails with the error of the writer.
+            if self._pending.pop(request_id, None) is not None:
+                raise
+        return await future
+
+    async def close(self):
+        self._writer.close()
+        try:
+            await self._receiver
+        except asyncio.CancelledError:
+            pass
+
+
+class StemClient:
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        host: str = "127.0.0.1",
+        port: Optional[int] = None,
+        pool_size: int = 4,
+    ):
+        """
+        Constructs StemClient, with a pool of connections to a StemServer. Use ``await client.connect()``, or
+        ``async with client``, before stemming.
+
+        :param path: (Optional) string, path of the server's Unix socket.
+        :param host: (Optional) string, host of the server, if it listens on a TCP port.
+        :param port: (Optional) int, TCP port of the server, used if there is no path.
+        :param pool_size: (Optional) int, number of connections, requests are spread over them in a round-robin.
+
+        :raises ValueError: if neither a path, nor a port is given.
+        """
+        if path is None and port is None:
+            raise ValueError("Either a Unix socket path or a TCP port is required")
+
+        self._path = path
+        self._host = host
+        self._port = port
+        self._pool_size = pool_size
+        self._connections = []
+        self._next = 0
+        # Closed connections being reopened, by their slot in the pool.
+        self._reopening = {}
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def _open(self):
+        if self._path is not None:
+            return await asyncio.open_unix_connection(self._path, limit=STREAM_LIMIT)
+
+        return await asyncio.open_connection(self._host, self._port, limit=STREAM_LIMIT)
+
+    async def connect(self):
+        """
+        Opens the connections of the pool, they replace the previous ones, if any.
+        """
+        connections = []
+        try:
+            for _ in range(self._pool_size):
+                reader, writer = await self._open()
+                connections.append(_Connection(reader, writer))
+        except BaseException:
+            for connection in connections:
+                await connection.close()
+            raise
+
+        await self.close()
+        self._connections = connections
+
+    async def close(self):
+        """
+        Closes the connections of the pool.
+        """
+        for task in self._reopening.values():
+            task.cancel()
+        self._reopening = {}
+        (connections, self._connections) = (self._connections, [])
+        self._next = 0
+        for connection in connections:
+            await connection.close()
+
+    async def _reopen(self, slot: int):
+        connections = self._connections
+        try:
+            reader, writer = await self._open()
+            connection = _Connection(reader, writer)
+            if self._connections is connections:
+                connections[slot] = connection
+            else:
+                # The pool was replaced (or closed) meanwhile.
+                await connection.close()
+        finally:
+            if self._connections is connections:
+                self._reopening.pop(slot, None)
+
+    async def _connection(self) -> _Connection:
+        if not self._connections:
+            raise ConnectionError("StemClient is not connected")
+
+        slot = self._next
+        self._next = (slot + 1) % len(self._connections)
+        if not self._connections[slot].closed:
+            return self._connections[slot]
+
+        # A dropped connection is reopened by the first request to reach it, the others wait for it.
+        task = self._reopening.get(slot)
+        if task is None:
+            task = self._reopening[slot] = asyncio.ensure_future(self._reopen(slot))
+        try:
+            await asyncio.shield(task)
+        except asyncio.CancelledError:
+            # Unless the client was closed meanwhile, the request itself is cancelled.
+            if not task.cancelled():
+                raise
+        if not self._connections:
+            raise ConnectionError("StemClient is closed")
+
+        return self._connections[slot]
+
+    async def stem_many(self, tokens: List[str]) -> List[str]:
+        """
+        Stems a batch of tokens on the server.
+
+        :param tokens: List[string], tokens to be stemmed.
+
+        :return: List[string], stems of the tokens.
+        :raises ValueError: if the server rejected the request.
+        :raises ConnectionError: if the connection is closed before the response.
+        :raises OSError: if a dropped connection can't be reopened.
+        """
+        connection = await self._connection()
+        return await connection.request(tokens)
+
+    async def stem(self, token: str) -> str:
+        """
+        Stems a single token on the server.
+
+        :param token: string, token to be stemmed.
+
+        :return: string, stem of the word.
+        """
+        return (await self.stem_many([token]))[0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Serves a BulStem stemmer over a Unix socket, or a TCP port."
+    )
+    address = parser.add_mutually_exclusive_group(required=True)
+    address.add_argument("--unix", help="path of the Unix socket")
+    address.add_argument("--port", type=int, help="TCP port")
+    parser.add_argument(
+        "--host", default="127.0.0.1", help="host to bind to, with --port"
+    )
+    parser.add_argument(
+        "-r",
+        "--rules",
+        default="stem-context-3",
+        help="path or pre-defined name of the stemrules",
+    )
+    parser.add_argument(
+        "--min-freq", type=int, default=2, help="minimum frequency of a rule"
+    )
+    parser.add_argument(
+        "--left-context",
+        type=int,
+        default=3,
+        help="size of the prefix which will not be stemmed",
+    )
+    parser.add_argument(
+        "--memory-map", action="store_true", help="use the memory-mapped compiled index"
+    )
+    parser.add_argument(
+        "--backend",
+        choices=sorted(BulStemmer.BACKENDS),
+        default="trie",
+        help="lookup backend of the rules",
+    )
+    parser.add_argument(
+        "--lexicon",
+        help="lexicon of precomputed stems (see bulstem.lexicon), looked up before the rules",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=0,
+        help="size of the stems cache, 0 disables it",
+    )
+    args = parser.parse_args(argv)
+
+    stemmer = BulStemmer.from_file(
+        args.rules,
+        min_freq=args.min_freq,
+        left_context=args.left_context,
+        memory_map=args.memory_map,
+        backend=args.backend,
+    )
+    if args.lexicon:
+        stemmer.use_lexicon(args.lexicon)
+    if args.cache_size > 0:
+        stemmer.enable_cache(args.cache_size)
+
+    server = StemServer(stemmer)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    if args.unix:
+        loop.run_until_complete(server.start_unix(args.unix))
+    else:
+        loop.run_until_complete(server.start_tcp(args.host, args.port))
+
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        loop.run_until_complete(server.close())
+        loop.close()
+
+
+if __name__ == "__main__":
+    main()
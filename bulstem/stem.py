@@ -15,9 +15,21 @@ Preslav Nakov, the algorithm's inventor, maintains a web page about the algorith
 which includes original Perl implementation, also a Java, and another Python version.
 """
 
+import functools
+import hashlib
 import pathlib
 import re
-from typing import Iterable
+import threading
+import time
+import typing
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from bulstem import columnar, index
+from bulstem.lexicon import Lexicon
+from bulstem.metrics import StemmerMetrics
+
+if typing.TYPE_CHECKING:
+    from concurrent.futures import Future
 
 
 class BulStemmer:
@@ -30,6 +42,9 @@ class BulStemmer:
 
     RULES_PATTERN = re.compile(r"([а-я]+)\s+==>\s+([а-я]+)\s+([0-9]+)", re.IGNORECASE)
     VOWELS = {"а", "ъ", "о", "у", "е", "и", "я", "ю"}
+    VOWELS_PATTERN = re.compile("[{0}]".format("".join(sorted(VOWELS))))
+    WORD_PATTERN = re.compile(r"\w+")
+    CYRILLIC_WORD_PATTERN = re.compile("[а-яѐѝА-ЯЀЍ]+")
 
     RULES_PRE_DEF_PATH = {
         "stem-context-1": "stem_rules_context_1_utf8.txt",
@@ -37,7 +52,14 @@ class BulStemmer:
         "stem-context-3": "stem_rules_context_3_utf8.txt",
     }
 
+    # Serializes the changes of the rules, while the lookups never wait for it.
+    _update_lock = threading.Lock()
+
     class TrieNode:
+        # Class-level defaults, so that only the nodes with a rule pay for them.
+        freq = 0
+        shadowed = None
+
         def __init__(self):
             """
             Constructs TrieNode.
@@ -48,6 +70,35 @@ class BulStemmer:
         def is_stem(self):
             return len(self.stem)
 
+        def get_stem(self, min_freq: Optional[int] = None) -> str:
+            """
+            Finds the stem of the node's rule, which has at least the minimum frequency.
+
+            :param min_freq: (Optional) int, the minimum frequency of the rule, by default it is not checked.
+
+            :return: string, the stem, or an empty string if there is no such rule.
+            """
+            if min_freq is None or self.freq >= min_freq:
+                return self.stem
+
+            # Duplicate rules shadowed by a later one are still used for higher frequencies.
+            for (stem, freq) in self.shadowed or ():
+                if freq >= min_freq:
+                    return stem
+
+            return ""
+
+        def copy(self) -> "BulStemmer.TrieNode":
+            """
+            Copies the node, the children are shared with the original.
+
+            :return: TrieNode, the copy.
+            """
+            node = BulStemmer.TrieNode.__new__(BulStemmer.TrieNode)
+            node.__dict__.update(self.__dict__)
+            node.chars = dict(self.chars)
+            return node
+
     class SuffixTrie:
         def __init__(self, allow_duplicates: bool = False):
             """
@@ -58,12 +109,13 @@ class BulStemmer:
             self._root = BulStemmer.TrieNode()
             self._allow_duplicates = allow_duplicates
 
-        def add(self, word: str, stem: str):
+        def add(self, word: str, stem: str, freq: int = 0):
             """
             Adds a single word with it's stem to the SuffixTrie.
 
             :param word: string, original word, before stemming.
             :param stem: string, corresponding stem.
+            :param freq: (Optional) int, frequency of the rule.
 
             :raises ValueError: if duplicates are found in the fields.
             """
@@ -73,20 +125,118 @@ class BulStemmer:
                     curr.chars[c] = BulStemmer.TrieNode()
                 curr = curr.chars[c]
 
-            if not self._allow_duplicates and curr.is_stem():
-                raise ValueError("Duplicate key '{0}' found".format(stem))
+            if curr.is_stem():
+                if not self._allow_duplicates:
+                    raise ValueError("Duplicate key '{0}' found".format(stem))
+
+                # The replaced rules with a higher frequency still apply when filtering by frequency.
+                shadowed = [(curr.stem, curr.freq)] + (curr.shadowed or [])
+                curr.shadowed = [(s, f) for (s, f) in shadowed if f > freq] or None
 
             curr.stem = stem
+            curr.freq = freq
+
+        def updated(
+            self,
+            added: Iterable[Tuple[str, str, int]] = (),
+            removed: Iterable[str] = (),
+            stats: Optional[Dict[str, int]] = None,
+        ) -> "BulStemmer.SuffixTrie":
+            """
+            Creates a copy of the SuffixTrie with a batch of rules changed, the SuffixTrie itself is left intact.
+            Only the nodes on the paths of the changed rules are copied, the rest are shared by both tries.
+
+            :param added: Iterable[tuple], rules (word, stem, freq) to be added, a rule replaces the one of the same
+                          word (along with its shadowed duplicates).
+            :param removed: Iterable[string], words whose rules are removed, the missing ones are skipped.
+            :param stats: (Optional) dict, filled with the number of added, updated and removed rules.
 
-        def get(self, word: str, vowel_idx: int) -> str:
+            :return: SuffixTrie, the updated copy.
+            """
+            trie = BulStemmer.SuffixTrie(self._allow_duplicates)
+            trie._root = self._root.copy()
+            copied = {id(trie._root)}
+            counts = {"added": 0, "updated": 0, "removed": 0}
+
+            # The removals go first, so that a word both removed and added is updated.
+            for word in removed:
+                word = word.lower()
+                path = trie._copy_path(word, copied, create=False)
+                if path is None or not path[-1].is_stem():
+                    continue
+
+                path[-1].stem = ""
+                path[-1].freq = 0
+                path[-1].shadowed = None
+                counts["removed"] += 1
+
+                # Prunes the nodes left without a rule and children, from the bottom up.
+                for i in range(len(path) - 1, 0, -1):
+                    if path[i].is_stem() or path[i].chars:
+                        break
+                    del path[i - 1].chars[word[-i]]
+
+            for (word, stem, freq) in added:
+                node = trie._copy_path(word.lower(), copied, create=True)[-1]
+                counts["updated" if node.is_stem() else "added"] += 1
+                node.stem = stem
+                node.freq = freq
+                if node.shadowed is not None:
+                    node.shadowed = None
+
+            if stats is not None:
+                stats.update(counts)
+
+            return trie
+
+        def _copy_path(
+            self, word: str, copied: set, create: bool
+        ) -> Optional[List["BulStemmer.TrieNode"]]:
+            """
+            Copies the nodes on the path of a word, unless they are already copied, so that they can be changed.
+
+            :param word: string, lower-cased word.
+            :param copied: set, ids of the nodes which are already copied, it is updated.
+            :param create: bool, if true the missing nodes are created, else None is returned.
+
+            :return: List[TrieNode], the nodes from the root to the word's node.
+            """
+            curr = self._root
+            path = [curr]
+            for c in reversed(word):
+                child = curr.chars.get(c)
+                if child is None:
+                    if not create:
+                        return None
+                    child = BulStemmer.TrieNode()
+                    copied.add(id(child))
+                elif id(child) not in copied:
+                    child = child.copy()
+                    copied.add(id(child))
+
+                curr.chars[c] = child
+                curr = child
+                path.append(curr)
+
+            return path
+
+        def get(
+            self, word: str, vowel_idx: int, min_freq: Optional[int] = None
+        ) -> str:
             """
             Finds the longest possible rule from the end of the word, and appends it to the non-stemmed prefix.
 
             :param word: string, original word, before stemming.
             :param vowel_idx: int, position of the first vowel.
+            :param min_freq: (Optional) int, the minimum frequency of a rule, by default all rules in the trie are used.
 
             :return: string, lower-cased and stemmed version of the word.
             """
+            if min_freq is not None:
+                (idx, stem, _) = self.find(word, vowel_idx, min_freq)
+                word = word.lower()
+                return word[:idx] + stem
+
             word = word.lower()
             stem = ""
             idx = len(word)
@@ -105,12 +255,222 @@ class BulStemmer:
 
             return word[:idx] + stem
 
+        def find(
+            self, word: str, vowel_idx: int, min_freq: Optional[int] = None
+        ) -> tuple:
+            """
+            Finds the longest possible rule from the end of the word, same as get, but returns the match.
+
+            :param word: string, original word, before stemming.
+            :param vowel_idx: int, position of the first vowel.
+            :param min_freq: (Optional) int, the minimum frequency of a rule, by default all rules in the trie are used.
+
+            :return: tuple, (start of the matched suffix, its stem, depth reached in the trie).
+            """
+            word = word.lower()
+            stem = ""
+            idx = len(word)
+            depth = 0
+            curr = self._root
+
+            for i in range(len(word) - 1, max(vowel_idx, 0) - 1, -1):
+                if word[i] not in curr.chars:
+                    break
+
+                curr = curr.chars[word[i]]
+                depth += 1
+
+                if curr.is_stem():
+                    node_stem = curr.get_stem(min_freq)
+                    if node_stem:
+                        stem = node_stem
+                        idx = i
+
+            return idx, stem, depth
+
+        def rules(self) -> Iterator[Tuple[str, str, int]]:
+            """
+            Iterates over the rules of the SuffixTrie, the shadowed duplicates come before the rule replacing them.
+
+            :return: Iterator[tuple], (word, stem, freq) of each rule.
+            """
+            stack = [("", self._root)]
+            while stack:
+                (word, node) = stack.pop()
+                if node.is_stem():
+                    for (stem, freq) in reversed(node.shadowed or ()):
+                        yield word, stem, freq
+                    yield word, node.stem, node.freq
+
+                for (c, child) in node.chars.items():
+                    stack.append((c + word, child))
+
+    class SuffixHash:
+        def __init__(self, allow_duplicates: bool = False):
+            """
+            Constructs SuffixHash, a flat hash table of the rules keyed by their words. Instead of walking a trie
+            character by character, a lookup probes the suffixes of a word from the longest to the shortest one.
+
+            :param allow_duplicates: (Optional) bool, if false it raises ValueError exception when duplicates are found.
+            """
+            self._stems = {}
+            self._freqs = {}
+            self._shadowed = {}
+            self._max_len = 0
+            self._allow_duplicates = allow_duplicates
+
+        def add(self, word: str, stem: str, freq: int = 0):
+            """
+            Adds a single word with it's stem to the SuffixHash.
+
+            :param word: string, original word, before stemming.
+            :param stem: string, corresponding stem.
+            :param freq: (Optional) int, frequency of the rule.
+
+            :raises ValueError: if duplicates are found in the fields.
+            """
+            word = word.lower()
+            if word in self._stems:
+                if not self._allow_duplicates:
+                    raise ValueError("Duplicate key '{0}' found".format(stem))
+
+                # The replaced rules with a higher frequency still apply when filtering by frequency.
+                shadowed = [(self._stems[word], self._freqs[word])]
+                shadowed += self._shadowed.pop(word, [])
+                shadowed = [(s, f) for (s, f) in shadowed if f > freq]
+                if shadowed:
+                    self._shadowed[word] = shadowed
+
+            self._stems[word] = stem
+            self._freqs[word] = freq
+            self._max_len = max(self._max_len, len(word))
+
+        def get(
+            self, word: str, vowel_idx: int, min_freq: Optional[int] = None
+        ) -> str:
+            """
+            Finds the longest possible rule from the end of the word, and appends it to the non-stemmed prefix.
+
+            :param word: string, original word, before stemming.
+            :param vowel_idx: int, position of the first vowel.
+            :param min_freq: (Optional) int, the minimum frequency of a rule, by default all rules are used.
+
+            :return: string, lower-cased and stemmed version of the word.
+            """
+            if min_freq is not None:
+                (idx, stem, _) = self.find(word, vowel_idx, min_freq)
+                word = word.lower()
+                return word[:idx] + stem
+
+            word = word.lower()
+            stems = self._stems
+            for i in range(max(len(word) - self._max_len, vowel_idx, 0), len(word)):
+                stem = stems.get(word[i:])
+                if stem is not None:
+                    return word[:i] + stem
+
+            return word
+
+        def find(
+            self, word: str, vowel_idx: int, min_freq: Optional[int] = None
+        ) -> tuple:
+            """
+            Finds the longest possible rule from the end of the word, same as get, but returns the match.
+
+            :param word: string, original word, before stemming.
+            :param vowel_idx: int, position of the first vowel.
+            :param min_freq: (Optional) int, the minimum frequency of a rule, by default all rules are used.
+
+            :return: tuple, (start of the matched suffix, its stem, length of the matched suffix).
+            """
+            word = word.lower()
+            for i in range(max(len(word) - self._max_len, vowel_idx, 0), len(word)):
+                suffix = word[i:]
+                if suffix in self._stems:
+                    stem = self._get_stem(suffix, min_freq)
+                    if stem:
+                        return i, stem, len(word) - i
+
+            return len(word), "", 0
+
+        def _get_stem(self, word: str, min_freq: Optional[int]) -> str:
+            if min_freq is None or self._freqs[word] >= min_freq:
+                return self._stems[word]
+
+            # Duplicate rules shadowed by a later one are still used for higher frequencies.
+            for (stem, freq) in self._shadowed.get(word, ()):
+                if freq >= min_freq:
+                    return stem
+
+            return ""
+
+        def updated(
+            self,
+            added: Iterable[Tuple[str, str, int]] = (),
+            removed: Iterable[str] = (),
+            stats: Optional[Dict[str, int]] = None,
+        ) -> "BulStemmer.SuffixHash":
+            """
+            Creates a copy of the SuffixHash with a batch of rules changed, the SuffixHash itself is left intact.
+
+            :param added: Iterable[tuple], rules (word, stem, freq) to be added, a rule replaces the one of the same
+                          word (along with its shadowed duplicates).
+            :param removed: Iterable[string], words whose rules are removed, the missing ones are skipped.
+            :param stats: (Optional) dict, filled with the number of added, updated and removed rules.
+
+            :return: SuffixHash, the updated copy.
+            """
+            table = BulStemmer.SuffixHash(self._allow_duplicates)
+            table._stems = dict(self._stems)
+            table._freqs = dict(self._freqs)
+            table._shadowed = dict(self._shadowed)
+            table._max_len = self._max_len
+            counts = {"added": 0, "updated": 0, "removed": 0}
+
+            # The removals go first, so that a word both removed and added is updated.
+            for word in removed:
+                word = word.lower()
+                if word in table._stems:
+                    del table._stems[word]
+                    del table._freqs[word]
+                    table._shadowed.pop(word, None)
+                    counts["removed"] += 1
+
+            for (word, stem, freq) in added:
+                word = word.lower()
+                counts["updated" if word in table._stems else "added"] += 1
+                table._stems[word] = stem
+                table._freqs[word] = freq
+                table._shadowed.pop(word, None)
+                table._max_len = max(table._max_len, len(word))
+
+            if stats is not None:
+                stats.update(counts)
+
+            return table
+
+        def rules(self) -> Iterator[Tuple[str, str, int]]:
+            """
+            Iterates over the rules of the SuffixHash, the shadowed duplicates come before the rule replacing them.
+
+            :return: Iterator[tuple], (word, stem, freq) of each rule.
+            """
+            for (word, stem) in self._stems.items():
+                for (shadowed_stem, freq) in reversed(self._shadowed.get(word, ())):
+                    yield word, shadowed_stem, freq
+                yield word, stem, self._freqs[word]
+
+    # Lookup backends, the trie is the reference implementation.
+    BACKENDS = {"trie": SuffixTrie, "hash": SuffixHash}
+
     def __init__(
         self,
         rules: Iterable[str],
         min_freq: int = 2,
         left_context: int = 3,
         allow_duplicates: bool = False,
+        metrics: Optional[StemmerMetrics] = None,
+        backend: Union[str, Callable] = "trie",
     ):
         """
         Constructs BulStemmer.
@@ -119,12 +479,45 @@ class BulStemmer:
         :param min_freq: (Optional) int, the minimum frequency of a rule to be used when stemming.
         :param left_context: (Optional) int, size of the prefix which will not be stemmed.
         :param allow_duplicates: (Optional) bool, if false it raises ValueError exception when duplicates are found.
+        :param metrics: (Optional) StemmerMetrics, if given the loading of the rules and the lookups are recorded.
+        :param backend: (Optional) string or callable, name of the lookup backend (see BACKENDS), or a class with the
+                        same interface as SuffixTrie (at least add, get and find).
 
-        :raises ValueError: if duplicates are found in the fields.
+        :raises ValueError: if duplicates are found in the fields, or the backend is unknown.
         """
+        if isinstance(backend, str):
+            if backend not in BulStemmer.BACKENDS:
+                raise ValueError(
+                    "Unknown lookup backend '{0}', expected one of: {1}".format(
+                        backend, ", ".join(BulStemmer.BACKENDS)
+                    )
+                )
+            backend = BulStemmer.BACKENDS[backend]
+
         self._min_freq = min_freq
         self._left_context = left_context
+        self._metrics = metrics
+        self._backend = backend
         self._stem_rules = self._read_rules(rules, allow_duplicates)
+        self._cache = None
+        self._lexicon = None
+        self._lexicon_hits = self._lexicon_misses = 0
+        self._rules_digest = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # The cache holds a reference to a bound method, only its size is carried over to a copy.
+        if self._cache is not None:
+            state["_cache"] = self._cache.cache_info().maxsize
+
+        return state
+
+    def __setstate__(self, state):
+        cache_size = state.pop("_cache")
+        self.__dict__.update(state)
+        self._cache = None
+        if cache_size is not None:
+            self.enable_cache(cache_size)
 
     @classmethod
     def from_file(
@@ -134,6 +527,9 @@ class BulStemmer:
         min_freq: int = 2,
         left_context: int = 3,
         allow_duplicates: bool = False,
+        memory_map: bool = False,
+        metrics: Optional[StemmerMetrics] = None,
+        backend: Union[str, Callable] = "trie",
     ) -> "BulStemmer":
         """
         Constructs BulStemmer from file.
@@ -143,9 +539,129 @@ class BulStemmer:
         :param min_freq: (Optional) int, the minimum frequency of a rule to be used when stemming.
         :param left_context: (Optional) int, size of the prefix which will not be stemmed.
         :param allow_duplicates: (Optional) bool, if false it raises ValueError exception when duplicates are found.
+        :param memory_map: (Optional) bool, if true and a compiled index is found, the rules are looked up directly in
+                           the memory-mapped index.
+        :param metrics: (Optional) StemmerMetrics, if given the loading of the rules and the lookups are recorded.
+        :param backend: (Optional) string or callable, the lookup backend (see __init__), it is not used if the rules
+                        are looked up in the memory-mapped index.
 
         :returns BulStemmer, an instance of BulStemmer.
-        :raises ValueError: if duplicates are found in the fields.
+        :raises ValueError: if duplicates are found in the fields, or the backend is unknown.
+        """
+        path = cls.resolve_path(path)
+
+        # A compiled index next to the rules file (see bulstem.index) skips the parsing, unless it is stale, or it was
+        # compiled with allow_duplicates while the caller does not allow them.
+        index_path = index.default_index_path(path, min_freq)
+        if index_path.is_file():
+            try:
+                return cls.from_index(
+                    index_path,
+                    path,
+                    left_context,
+                    memory_map,
+                    metrics,
+                    backend,
+                    allow_duplicates,
+                )
+            except ValueError:
+                pass
+
+        with open(path, "r", encoding=encoding) as rules_stream:
+            stemmer = cls(
+                rules_stream,
+                min_freq,
+                left_context,
+                allow_duplicates,
+                metrics,
+                backend,
+            )
+        stemmer._rules_digest = (
+            stemmer._stem_rules,
+            cls._source_digest(index.file_digest(path), min_freq),
+        )
+        return stemmer
+
+    @classmethod
+    def from_index(
+        cls,
+        path: str,
+        rules_path: Optional[str] = None,
+        left_context: int = 3,
+        memory_map: bool = False,
+        metrics: Optional[StemmerMetrics] = None,
+        backend: Union[str, Callable] = "trie",
+        allow_duplicates: Optional[bool] = None,
+    ) -> "BulStemmer":
+        """
+        Constructs BulStemmer from a compiled index (see bulstem.index.compile_rules).
+
+        :param path: string, path to the compiled index.
+        :param rules_path: (Optional) string, path (or pre-defined name) to the stemrules file the index was compiled
+                           from, if given the index is validated against the file's hash.
+        :param left_context: (Optional) int, size of the prefix which will not be stemmed.
+        :param memory_map: (Optional) bool, if true the rules are looked up directly in the memory-mapped index,
+                           which is shared between all processes using it, instead of being loaded into a SuffixTrie.
+        :param metrics: (Optional) StemmerMetrics, if given the loading of the index and the lookups are recorded.
+        :param backend: (Optional) string or callable, the lookup backend (see __init__), it is not used if memory_map
+                        is true.
+        :param allow_duplicates: (Optional) bool, if false the index must have been compiled without allow_duplicates.
+
+        :returns BulStemmer, an instance of BulStemmer.
+        :raises ValueError: if the index is invalid, out of date with the rules file, or compiled with allow_duplicates
+                            while the caller does not allow them, or the backend is unknown.
+        """
+        start = time.perf_counter()
+        digest = None
+        if rules_path is not None:
+            digest = index.file_digest(cls.resolve_path(rules_path))
+
+        if memory_map:
+            stem_rules = index.MappedSuffixTrie(path, digest, allow_duplicates)
+            stemmer = cls([], stem_rules.min_freq, left_context)
+            stemmer._stem_rules = stem_rules
+            (stem_id, alt_node) = (stem_rules._stem_id, stem_rules._alt_node)
+            rules_digest = cls._source_digest(stem_rules.digest, stem_rules.min_freq)
+        else:
+            trie_index = index.read_index(path, digest, allow_duplicates)
+            # The index already holds the shadowed duplicates, if there are any.
+            stemmer = cls(
+                [],
+                trie_index.min_freq,
+                left_context,
+                trie_index.allow_duplicates or bool(allow_duplicates),
+                backend=backend,
+            )
+            root = index.build_trie(trie_index, BulStemmer.TrieNode)
+            if isinstance(stemmer._stem_rules, BulStemmer.SuffixTrie):
+                stemmer._stem_rules._root = root
+            else:
+                trie = BulStemmer.SuffixTrie()
+                trie._root = root
+                for (word, stem, freq) in trie.rules():
+                    stemmer._stem_rules.add(word, stem, freq)
+            (stem_id, alt_node) = (trie_index.stem_id, trie_index.alt_node)
+            rules_digest = cls._source_digest(trie_index.digest, trie_index.min_freq)
+
+        # The index holds the digest of its rules file, so the rules need not be listed (see rules_digest).
+        stemmer._rules_digest = (stemmer._stem_rules, rules_digest)
+
+        if metrics is not None:
+            # Each node with a stem holds a rule, and each alternative a shadowed duplicate.
+            rules_kept = sum(map(bool, stem_id)) + len(alt_node)
+            metrics.record_load(time.perf_counter() - start, 0, rules_kept, 0)
+            stemmer._metrics = metrics
+
+        return stemmer
+
+    @classmethod
+    def resolve_path(cls, path: str) -> str:
+        """
+        Resolves a pre-defined name of a rule set to the path of its stemrules file.
+
+        :param path: string, path or pre-defined name (see RULES_PRE_DEF_PATH).
+
+        :return: string, path to the stemrules file.
         """
         if path in cls.RULES_PRE_DEF_PATH:
             path = str(
@@ -154,9 +670,52 @@ class BulStemmer:
                 / cls.RULES_PRE_DEF_PATH[path]
             )
 
-        with open(path, "r", encoding=encoding) as rules_stream:
-            stemmer = cls(rules_stream, min_freq, left_context, allow_duplicates)
-            return stemmer
+        return path
+
+    @classmethod
+    def parse_rules(cls, rules: Iterable[str]) -> Iterator[Tuple[str, str, int]]:
+        """
+        Parses stemrules, the lines which are not formatted as a rule are skipped.
+
+        :param rules: Iterable[string], a collection of strings formatted, as follows: word ==> stem freq.
+
+        :return: Iterator[tuple], (word, stem, freq) of each rule.
+        """
+        for line in rules:
+            m = cls.RULES_PATTERN.match(line.strip())
+            if m:
+                (word, stem, freq) = m.groups()
+                yield word, stem, int(freq)
+
+    @classmethod
+    def diff_rules(
+        cls, old_rules: Iterable[str], new_rules: Iterable[str]
+    ) -> Tuple[List[str], List[str]]:
+        """
+        Compares two collections of stemrules, e.g. two versions of a rules file. Of the duplicate rules of a word
+        only the last one is compared.
+
+        :param old_rules: Iterable[string], the old rules formatted: word ==> stem freq.
+        :param new_rules: Iterable[string], the new rules formatted: word ==> stem freq.
+
+        :return: tuple, (the new or changed rules, the words whose rules were removed), see update_rules.
+        """
+        old = {
+            word.lower(): (stem, freq)
+            for (word, stem, freq) in cls.parse_rules(old_rules)
+        }
+        new = {
+            word.lower(): (stem, freq)
+            for (word, stem, freq) in cls.parse_rules(new_rules)
+        }
+
+        added = [
+            "{0} ==> {1} {2}".format(word, stem, freq)
+            for (word, (stem, freq)) in new.items()
+            if old.get(word) != (stem, freq)
+        ]
+        removed = [word for word in old if word not in new]
+        return added, removed
 
     def _read_rules(self, rules: Iterable[str], allow_duplicates: bool = False):
         """
@@ -165,21 +724,155 @@ class BulStemmer:
         :param rules: Iterable[string], a collection of strings formatted, as follows: word ==> stem freq.
         :param allow_duplicates: (Optional) bool, if false it raises ValueError exception when duplicates are found.
 
-        :return: SuffixTrie, Trie filled with stemming stemrules.
+        :return: SuffixTrie (or the chosen backend), Trie filled with stemming stemrules.
         :raises ValueError: if duplicates are found in the fields.
         """
-        stem_rules = BulStemmer.SuffixTrie(allow_duplicates)
+        start = time.perf_counter()
+        lines_parsed = rules_kept = rules_dropped = 0
+
+        stem_rules = self._backend(allow_duplicates)
         for line in rules:
+            lines_parsed += 1
             m = BulStemmer.RULES_PATTERN.match(line.strip())
             if not m or len(m.groups()) != 3:
                 continue
 
             (word, stem, freq) = m.groups()
-            if int(freq) >= self._min_freq:
-                stem_rules.add(word, stem)
+            freq = int(freq)
+            if freq >= self._min_freq:
+                stem_rules.add(word, stem, freq)
+                rules_kept += 1
+            else:
+                rules_dropped += 1
+
+        if self._metrics is not None:
+            self._metrics.record_load(
+                time.perf_counter() - start, lines_parsed, rules_kept, rules_dropped
+            )
 
         return stem_rules
 
+    def _swap_rules(self, stem_rules, rules_digest: Optional[tuple] = None):
+        # A single assignment, so the concurrent lookups use either the old or the new rules, but never a mix of them.
+        self._stem_rules = stem_rules
+        # Kept along with the rules it belongs to, the digest of changed rules is computed when it is needed.
+        self._rules_digest = rules_digest
+        # The stems of the lexicon were computed with the old rules.
+        self._lexicon = None
+        self.cache_clear()
+
+    def update_rules(
+        self, added: Iterable[str] = (), removed: Iterable[str] = ()
+    ) -> Dict[str, int]:
+        """
+        Changes a batch of rules, without rebuilding the stemmer. The rules are changed in a copy of the trie, which
+        shares the unchanged nodes, and replaces the current one at once. Hence, the concurrent stem() calls see either
+        all of the changes or none of them. The cache is cleared.
+
+        :param added: Iterable[string], rules formatted: word ==> stem freq, each replaces the rule of the same word.
+                      The rules below the minimum frequency are dropped, and remove the rule of the same word.
+        :param removed: Iterable[string], words (or rules formatted: word ==> stem freq) whose rules are removed.
+
+        :return: dict, the number of added, updated, removed and dropped rules.
+        :raises ValueError: if the rules are looked up in a memory-mapped index (or a backend), which is read-only.
+        """
+        if not hasattr(self._stem_rules, "updated"):
+            raise ValueError(
+                "The rules of {0} can't be updated, use reload_rules".format(
+                    type(self._stem_rules).__name__
+                )
+            )
+
+        words = []
+        for word in removed:
+            m = BulStemmer.RULES_PATTERN.match(word.strip())
+            words.append(m.group(1) if m else word.strip())
+
+        kept = []
+        dropped = 0
+        for (word, stem, freq) in self.parse_rules(added):
+            if freq >= self._min_freq:
+                kept.append((word, stem, freq))
+            else:
+                words.append(word)
+                dropped += 1
+
+        stats = {}
+        with BulStemmer._update_lock:
+            self._swap_rules(self._stem_rules.updated(kept, words, stats))
+
+        stats["dropped"] = dropped
+        return stats
+
+    def apply_rules_diff(
+        self, old_path: str, new_path: str, encoding: str = "utf-8"
+    ) -> Dict[str, int]:
+        """
+        Applies the differences between two versions of a stemrules file (see diff_rules and update_rules).
+
+        :param old_path: string, path (or pre-defined name) to the stemrules file the stemmer was built from.
+        :param new_path: string, path to the new version of the stemrules file.
+        :param encoding: (Optional) string, encoding of the stemrules files.
+
+        :return: dict, the number of added, updated, removed and dropped rules.
+        :raises ValueError: if the rules are looked up in a memory-mapped index (or a backend), which is read-only.
+        """
+        old_path = self.resolve_path(old_path)
+        new_path = self.resolve_path(new_path)
+        with open(old_path, "r", encoding=encoding) as old_stream:
+            with open(new_path, "r", encoding=encoding) as new_stream:
+                (added, removed) = self.diff_rules(old_stream, new_stream)
+
+        return self.update_rules(added, removed)
+
+    def reload_rules(
+        self,
+        path: str,
+        encoding: str = "utf-8",
+        allow_duplicates: bool = False,
+        background: bool = False,
+    ) -> Optional["Future"]:
+        """
+        Replaces all rules with the ones of a stemrules file (or of its compiled index, see from_file). The new rules
+        are built aside, and replace the current ones at once, until then the concurrent stem() calls keep using the
+        old rules. The cache is cleared.
+
+        :param path: string, path (or pre-defined name) to the stemrules file formatted: word ==> stem freq.
+        :param encoding: (Optional) string, encoding of the stemrules file.
+        :param allow_duplicates: (Optional) bool, if false it raises ValueError exception when duplicates are found.
+        :param background: (Optional) bool, if true the rules are built in a background thread.
+
+        :return: concurrent.futures.Future, done once the rules are replaced, if background, else None.
+        :raises ValueError: if duplicates are found in the fields.
+        """
+        if background:
+            from concurrent.futures import ThreadPoolExecutor
+
+            executor = ThreadPoolExecutor(max_workers=1)
+            try:
+                return executor.submit(
+                    self.reload_rules, path, encoding, allow_duplicates
+                )
+            finally:
+                executor.shutdown(wait=False)
+
+        memory_map = isinstance(self._stem_rules, index.MappedSuffixTrie)
+        stemmer = self.from_file(
+            path,
+            encoding,
+            self._min_freq,
+            self._left_context,
+            allow_duplicates,
+            memory_map,
+            self._metrics,
+            self._backend,
+        )
+
+        with BulStemmer._update_lock:
+            self._swap_rules(stemmer._stem_rules, stemmer._rules_digest)
+
+        return None
+
     @staticmethod
     def pos_first_vowel(token: str) -> int:
         """
@@ -189,25 +882,338 @@ class BulStemmer:
 
         :return: int, position of the first vowel, if found, else one position after the last index.
         """
-        i = 0
-        while i < len(token) and token[i] not in BulStemmer.VOWELS:
-            i += 1
+        m = BulStemmer.VOWELS_PATTERN.search(token)
+        return m.start() if m else len(token)
+
+    def enable_cache(self, maxsize: int = 100000):
+        """
+        Enables memoization of the stems of the most recently used tokens. The cache is thread-safe.
+
+        :param maxsize: (Optional) int, the maximum number of cached tokens, the least recently used are evicted.
+
+        :raises ValueError: if maxsize is not positive.
+        """
+        if maxsize <= 0:
+            raise ValueError("Cache size must be positive, got {0}".format(maxsize))
+
+        self._cache = functools.lru_cache(maxsize)(self._stem)
+
+    def disable_cache(self):
+        """
+        Disables the memoization of stems, and drops the cached ones.
+        """
+        self._cache = None
+
+    def cache_clear(self):
+        """
+        Drops all cached stems and resets the statistics, e.g. after the rules are changed.
+        """
+        if self._cache is not None:
+            # A new cache, so stems computed concurrently with the old rules can't end up in it.
+            self.enable_cache(self._cache.cache_info().maxsize)
+
+    def cache_info(self) -> Optional[Dict[str, int]]:
+        """
+        Returns the cache statistics.
+
+        :return: dict, hits, misses, evictions, current and maximum size, or None if the cache is not enabled.
+        """
+        if self._cache is None:
+            return None
+
+        info = self._cache.cache_info()
+        return {
+            "hits": info.hits,
+            "misses": info.misses,
+            "evictions": max(info.misses - info.currsize, 0),
+            "size": info.currsize,
+            "maxsize": info.maxsize,
+        }
+
+    @staticmethod
+    def _source_digest(file_digest: bytes, min_freq: int) -> bytes:
+        sha = hashlib.sha256(b"file ")
+        sha.update(file_digest)
+        sha.update(" {0}\n".format(min_freq).encode("utf-8"))
+        return sha.digest()
+
+    def rules_digest(self) -> bytes:
+        """
+        Returns the sha256 digest which identifies the rules in use, regardless of the lookup backend. The stemmers
+        loaded from a rules file (or its compiled index) are identified by the digest of the file and min_freq. The
+        rules of the other stemmers, or the rules changed by update_rules, are listed and hashed on the first call.
 
-        return i
+        :return: bytes, the raw sha256 digest.
+        :raises ValueError: if the lookup backend can't list its rules.
+        """
+        stem_rules = self._stem_rules
+        if self._rules_digest is not None and self._rules_digest[0] is stem_rules:
+            return self._rules_digest[1]
+
+        if not hasattr(stem_rules, "rules"):
+            raise ValueError(
+                "The rules of {0} can't be listed".format(type(stem_rules).__name__)
+            )
+
+        sha = hashlib.sha256()
+        # Sorted by word, so that the order of the backend doesn't matter, while the duplicates keep their own order.
+        for (word, stem, freq) in sorted(stem_rules.rules(), key=lambda rule: rule[0]):
+            sha.update("{0} ==> {1} {2}\n".format(word, stem, freq).encode("utf-8"))
+
+        # Kept along with the rules it was computed for, since they might be replaced concurrently.
+        self._rules_digest = (stem_rules, sha.digest())
+        return self._rules_digest[1]
 
-    def stem(self, token: str) -> str:
+    def use_lexicon(self, lexicon: Optional[Union[str, Lexicon]]):
+        """
+        Looks up the tokens in a lexicon of precomputed stems (see bulstem.lexicon) first, and applies the rules only
+        to the tokens missing from it. The lexicon is detached once the rules are changed (see update_rules).
+
+        :param lexicon: string or Lexicon, path to the lexicon file, or the lexicon itself, None detaches it.
+
+        :raises ValueError: if the lexicon is invalid, or it was built with different rules, min_freq or left_context.
+        """
+        if isinstance(lexicon, (str, pathlib.Path)):
+            lexicon = Lexicon(lexicon)
+        if lexicon is not None and (
+            lexicon.min_freq != self._min_freq
+            or lexicon.left_context != self._left_context
+        ):
+            raise ValueError(
+                "Lexicon built with min_freq={0}, left_context={1}, expected {2}, {3}".format(
+                    lexicon.min_freq,
+                    lexicon.left_context,
+                    self._min_freq,
+                    self._left_context,
+                )
+            )
+        if lexicon is not None and lexicon.digest != self.rules_digest():
+            raise ValueError("Lexicon built with different rules")
+
+        self._lexicon = lexicon
+        self._lexicon_hits = self._lexicon_misses = 0
+        self.cache_clear()
+
+    def lexicon_info(self) -> Optional[Dict[str, float]]:
+        """
+        Returns the lexicon statistics, since it was attached. The counters are not synchronized, hence they might be
+        slightly off when stemming from several threads.
+
+        :return: dict, hits, misses, hit rate and number of words, or None if there is no lexicon.
+        """
+        if self._lexicon is None:
+            return None
+
+        lookups = self._lexicon_hits + self._lexicon_misses
+        return {
+            "hits": self._lexicon_hits,
+            "misses": self._lexicon_misses,
+            "hit_rate": self._lexicon_hits / lookups if lookups else 0.0,
+            "size": len(self._lexicon),
+        }
+
+    @property
+    def metrics(self) -> Optional[StemmerMetrics]:
+        """
+        :return: StemmerMetrics, the metrics of the stemmer, or None if it is not instrumented.
+        """
+        return self._metrics
+
+    def stem(self, token: str, min_freq: Optional[int] = None) -> str:
         """
         The stemming is performed by applying the longest possible rule (if any), provided that the stem produced
         contains at least one vowel.
 
         :param token: string, token to be stemmed.
+        :param min_freq: (Optional) int, the minimum frequency of a rule to be used, instead of the one given when
+                         constructing the stemmer. It can't be lower than the latter, since those rules were dropped.
 
         :return: string, stem of the word.
+        :raises ValueError: if min_freq is lower than the minimum frequency of the stemmer.
         """
+        if min_freq is not None:
+            if min_freq < self._min_freq:
+                raise ValueError(
+                    "min_freq must be at least {0}, got {1}".format(
+                        self._min_freq, min_freq
+                    )
+                )
+            if min_freq == self._min_freq:
+                min_freq = None
+
+        if self._cache is not None:
+            return self._cache(token, min_freq)
+
+        return self._stem(token, min_freq)
+
+    def _stem(self, token: str, min_freq: Optional[int] = None) -> str:
+        # The lexicon holds the stems for the default minimum frequency only.
+        if self._lexicon is not None and min_freq is None:
+            stem = self._lexicon.get(token)
+            if stem is not None:
+                self._lexicon_hits += 1
+                return stem
+            self._lexicon_misses += 1
+
+        if self._metrics is not None:
+            return self._stem_instrumented(token, min_freq)
+
         stem = token.lower()
         if len(stem) > self._left_context:
             # There must be at least one vowel in the resultant stem, hence we stem everything after the first one.
             i = BulStemmer.pos_first_vowel(stem) + 1
-            stem = self._stem_rules.get(stem, i)
+            stem = self._stem_rules.get(stem, i, min_freq)
+
+        return stem
+
+    def _stem_func(self, min_freq: Optional[int]):
+        if min_freq is None:
+            return self.stem
+
+        return functools.partial(self.stem, min_freq=min_freq)
+
+    def stem_text(self, text: str, min_freq: Optional[int] = None) -> str:
+        """
+        Stems every word of a text, while the rest of it (whitespace, punctuation, etc.) is kept intact.
+
+        :param text: string, text to be stemmed.
+        :param min_freq: (Optional) int, the minimum frequency of a rule to be used (see stem).
+
+        :return: string, the text with each word replaced by its stem.
+        """
+        stem = self._stem_func(min_freq)
+        return BulStemmer.WORD_PATTERN.sub(lambda m: stem(m.group()), text)
+
+    def stem_spans(
+        self, text: str, min_freq: Optional[int] = None
+    ) -> Iterator[Tuple[int, int, str]]:
+        """
+        Finds the Cyrillic words of a text, in a single pass of a compiled regex, and stems them, each distinct word
+        only once. The text is not split or copied, and the offsets can be used directly for highlighting or indexing.
+
+        :param text: string, text to be stemmed.
+        :param min_freq: (Optional) int, the minimum frequency of a rule to be used (see stem).
+
+        :return: Iterator[tuple], (start, end, stem) of each word, where text[start:end] is the word.
+        """
+        stems = {}
+        stem = self._stem_func(min_freq)
+
+        for m in BulStemmer.CYRILLIC_WORD_PATTERN.finditer(text):
+            token = m.group()
+            token_stem = stems.get(token)
+            if token_stem is None:
+                stems[token] = token_stem = stem(token)
+
+            (start, end) = m.span()
+            yield start, end, token_stem
+
+    def stem_spans_into(
+        self, text: str, starts, ends, stems, min_freq: Optional[int] = None
+    ) -> int:
+        """
+        Same as stem_spans, but writes the spans into preallocated sequences, e.g. array.array or numpy arrays for the
+        offsets, and a list for the stems. A text of n characters has at most (n + 1) // 2 words.
+
+        :param text: string, text to be stemmed.
+        :param starts: mutable sequence of int, filled with the start offsets of the words.
+        :param ends: mutable sequence of int, filled with the end offsets of the words.
+        :param stems: mutable sequence of string, filled with the stems of the words.
+        :param min_freq: (Optional) int, the minimum frequency of a rule to be used (see stem).
+
+        :return: int, the number of words, only that many items of the sequences are written.
+        :raises ValueError: if the sequences are too short to hold all words of the text.
+        """
+        capacity = min(len(starts), len(ends), len(stems))
+        count = 0
+
+        for (start, end, stem) in self.stem_spans(text, min_freq):
+            if count == capacity:
+                raise ValueError(
+                    "The sequences hold only {0} of the words".format(capacity)
+                )
+
+            starts[count] = start
+            ends[count] = end
+            stems[count] = stem
+            count += 1
+
+        return count
+
+    def stem_many(
+        self, tokens: Iterable[str], min_freq: Optional[int] = None
+    ) -> List[str]:
+        """
+        Stems a batch of tokens, each distinct token in the batch is stemmed only once.
+
+        :param tokens: Iterable[string], tokens to be stemmed.
+        :param min_freq: (Optional) int, the minimum frequency of a rule to be used (see stem).
+
+        :return: List[string], stems of the tokens, in the same order.
+        """
+        stems = {}
+        stem = self._stem_func(min_freq)
+        result = []
+        append = result.append
+
+        for token in tokens:
+            try:
+                append(stems[token])
+            except KeyError:
+                stems[token] = token_stem = stem(token)
+                append(token_stem)
+
+        return result
+
+    def stem_column(self, column):
+        """
+        Stems a column of tokens, each distinct token is stemmed only once (see bulstem.columnar).
+
+        :param column: numpy.ndarray, pyarrow.Array, pyarrow.ChunkedArray or pandas.Series of strings.
+
+        :return: a column of the same type with the stems, dictionary-encoded for Arrow, categorical for pandas.
+        :raises TypeError: if the type of the column is not supported.
+        """
+        return columnar.stem_column(self, column)
+
+    def stem_iter(
+        self,
+        tokens: Iterable[str],
+        max_distinct: int = 100000,
+        min_freq: Optional[int] = None,
+    ) -> Iterator[str]:
+        """
+        Lazily stems a stream of tokens, each distinct token is stemmed only once, until max_distinct of them are seen.
+
+        :param tokens: Iterable[string], tokens to be stemmed.
+        :param max_distinct: (Optional) int, the number of distinct tokens remembered, after that they are forgotten.
+        :param min_freq: (Optional) int, the minimum frequency of a rule to be used (see stem).
+
+        :return: Iterator[string], stems of the tokens, in the same order.
+        """
+        stems = {}
+        stem = self._stem_func(min_freq)
+
+        for token in tokens:
+            try:
+                yield stems[token]
+            except KeyError:
+                if len(stems) >= max_distinct:
+                    stems.clear()
+                stems[token] = token_stem = stem(token)
+                yield token_stem
+
+    def _stem_instrumented(self, token: str, min_freq: Optional[int] = None) -> str:
+        stem = token.lower()
+        depth = 0
+        rule = None
+
+        if len(stem) > self._left_context:
+            i = BulStemmer.pos_first_vowel(stem) + 1
+            (idx, suffix_stem, depth) = self._stem_rules.find(stem, i, min_freq)
+            if idx < len(stem):
+                rule = "{0} ==> {1}".format(stem[idx:], suffix_stem)
+                stem = stem[:idx] + suffix_stem
 
+        self._metrics.record_lookup(depth, rule)
         return stem
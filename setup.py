@@ -4,6 +4,7 @@ from setuptools import find_packages, setup
 
 extras = {}
 extras["testing"] = ["pytest", "nltk"]
+extras["columnar"] = ["numpy", "pandas", "pyarrow"]
 
 setup(
     name="bulstem",
@@ -19,9 +20,9 @@ setup(
     packages=find_packages(exclude=["*.tests", "*.tests.*", "tests.*", "tests"]),
     install_requires=[],
     extras_require=extras,
-    entry_points={},
+    entry_points={"console_scripts": ["bulstem=bulstem.__main__:main"]},
     include_package_data=True,
-    package_data={"bulstem": ["stemrules/*.txt"]},
+    package_data={"bulstem": ["stemrules/*.txt", "stemrules/*.idx"]},
     python_requires=">=3.6.0",
     classifiers=[
         "Intended Audience :: Developers",
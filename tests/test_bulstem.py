@@ -1,6 +1,10 @@
 # coding=utf-8
 
+import array
 import pathlib
+import pickle
+import tempfile
+import threading
 import unittest
 
 import nltk
@@ -150,3 +154,254 @@ class BulStemmerTest(unittest.TestCase):
         stemmer = BulStemmer.from_file("stem-context-2", min_freq=2, left_context=2)
         self.assertEqual("вероят", stemmer.stem("вероятен"))
         self.assertEqual("този", stemmer.stem("този"))
+
+    def test_stem_many(self):
+        stemmer = BulStemmer.from_file("stem-context-2", min_freq=2, left_context=2)
+        tokens = ["вероятен", "Вероятен", "този", "вероятен", "оставката", "той"]
+        expected = [stemmer.stem(token) for token in tokens]
+
+        self.assertEqual(expected, stemmer.stem_many(tokens))
+        self.assertEqual(expected, stemmer.stem_many(iter(tokens)))
+        self.assertEqual(expected, list(stemmer.stem_iter(tokens)))
+        self.assertEqual(expected, list(stemmer.stem_iter(tokens, max_distinct=2)))
+        self.assertEqual([], stemmer.stem_many([]))
+
+    def test_cache(self):
+        stemmer = BulStemmer.from_file("stem-context-2", min_freq=2, left_context=2)
+        self.assertIsNone(stemmer.cache_info())
+
+        tokens = ["вероятен", "вероятен", "този", "оставката", "вероятен"]
+        expected = [stemmer.stem(token) for token in tokens]
+
+        stemmer.enable_cache(2)
+        self.assertEqual(expected, [stemmer.stem(token) for token in tokens])
+        self.assertEqual(
+            {"hits": 1, "misses": 4, "evictions": 2, "size": 2, "maxsize": 2},
+            stemmer.cache_info(),
+        )
+
+        stemmer.cache_clear()
+        self.assertEqual(0, stemmer.cache_info()["size"])
+        stemmer.disable_cache()
+        self.assertIsNone(stemmer.cache_info())
+
+        with self.assertRaises(ValueError):
+            stemmer.enable_cache(0)
+
+    def test_cache_pickle(self):
+        stemmer = BulStemmer.from_file("stem-context-2", min_freq=2, left_context=2)
+        stemmer.enable_cache(10)
+        stemmer.stem("вероятен")
+
+        stemmer = pickle.loads(pickle.dumps(stemmer))
+        self.assertEqual(0, stemmer.cache_info()["size"])
+        self.assertEqual("вероят", stemmer.stem("вероятен"))
+        self.assertEqual(1, stemmer.cache_info()["misses"])
+
+    def test_stem_text(self):
+        stemmer = BulStemmer.from_file("stem-context-2", min_freq=2, left_context=2)
+        self.assertEqual(
+            "  става дума за 33-годиш пациент, койт на 16 апр!\n",
+            stemmer.stem_text(
+                "  Става дума за 33-годишен пациент, който на 16 април!\n"
+            ),
+        )
+
+    def test_stem_spans(self):
+        stemmer = BulStemmer.from_file("stem-context-2", min_freq=2, left_context=2)
+        text = "  Става дума за 33-годишен пациент, който на 16 април (Pierre)!\n"
+        spans = list(stemmer.stem_spans(text))
+        self.assertEqual(
+            [
+                "става",
+                "дума",
+                "за",
+                "годиш",
+                "пациент",
+                "койт",
+                "на",
+                "апр",
+            ],
+            [stem for (_, _, stem) in spans],
+        )
+        for (start, end, stem) in spans:
+            self.assertEqual(stemmer.stem(text[start:end]), stem)
+        self.assertEqual((2, 7), spans[0][:2])
+
+        starts = array.array("I", [0] * 10)
+        ends = array.array("I", [0] * 10)
+        stems = [None] * 10
+        self.assertEqual(8, stemmer.stem_spans_into(text, starts, ends, stems))
+        self.assertEqual(spans, list(zip(starts, ends, stems))[:8])
+
+        with self.assertRaises(ValueError):
+            stemmer.stem_spans_into(text, starts[:4], ends, stems)
+
+    def test_query_min_freq(self):
+        stemmer = BulStemmer.from_file(
+            BulStemmerTest.RULES_2_PATH, min_freq=1, left_context=2
+        )
+        with open(
+            str(BulStemmerTest.RULES_2_PATH), "r", encoding="utf-8"
+        ) as rules_stream:
+            words = [line.split()[0] for line in rules_stream]
+
+        for min_freq in (2, 10, 1000):
+            expected = BulStemmer.from_file(
+                BulStemmerTest.RULES_2_PATH, min_freq=min_freq, left_context=2
+            )
+            for word in words[::7]:
+                for token in (word, "по" + word):
+                    self.assertEqual(
+                        expected.stem(token), stemmer.stem(token, min_freq)
+                    )
+
+        with self.assertRaises(ValueError):
+            stemmer.stem("вероятен", min_freq=0)
+
+    def test_query_min_freq_duplicates(self):
+        rules = ["ой ==> о 10", "ой ==> ой 3", "ой ==> х 20", "ой ==> у 5"]
+        stemmer = BulStemmer(rules, min_freq=0, left_context=0, allow_duplicates=True)
+
+        for min_freq in range(0, 22):
+            expected = BulStemmer(
+                rules, min_freq=min_freq, left_context=0, allow_duplicates=True
+            )
+            self.assertEqual(expected.stem("порой"), stemmer.stem("порой", min_freq))
+            self.assertEqual(
+                expected.stem_many(["порой", "той"]),
+                stemmer.stem_many(["порой", "той"], min_freq=min_freq),
+            )
+
+    def test_update_rules(self):
+        stemmer = BulStemmer(
+            ["ите ==> и 5", "ата ==> а 5", "ове ==> 3"], min_freq=2, left_context=1
+        )
+        old_rules = stemmer._stem_rules
+        stemmer.enable_cache()
+        self.assertEqual("града", stemmer.stem("градата"))
+
+        stats = stemmer.update_rules(
+            ["ата ==> ат 4", "ове ==> о 2", "ища ==> ищ 1"], ["ите"]
+        )
+        self.assertEqual({"added": 1, "updated": 1, "removed": 1, "dropped": 1}, stats)
+        self.assertEqual(0, stemmer.cache_info()["size"])
+        self.assertEqual("градат", stemmer.stem("градата"))
+        self.assertEqual("градо", stemmer.stem("градове"))
+        self.assertEqual("градите", stemmer.stem("градите"))
+        self.assertEqual("огнища", stemmer.stem("огнища"))
+
+        # The old trie is left intact for the lookups still using it.
+        self.assertEqual("гради", old_rules.get("градите", 2))
+        self.assertEqual("града", old_rules.get("градата", 2))
+
+        # A rule below the minimum frequency removes the current one.
+        stemmer.update_rules(["ата ==> ат 1"])
+        self.assertEqual("градата", stemmer.stem("градата"))
+
+    def test_apply_rules_diff(self):
+        with open(str(BulStemmerTest.RULES_2_PATH), "r", encoding="utf-8") as stream:
+            old_rules = stream.readlines()
+        # Removes, changes and adds rules.
+        new_rules = old_rules[::2] + [
+            line.replace("==> ", "==> а") for line in old_rules[1:1000:2]
+        ]
+        new_rules.append("зъглавница ==> зъглав 7\n")
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            new_path = pathlib.Path(tmp_dir) / "rules.txt"
+            with open(str(new_path), "w", encoding="utf-8") as stream:
+                stream.writelines(new_rules)
+
+            stemmer = BulStemmer.from_file(
+                BulStemmerTest.RULES_2_PATH, min_freq=2, left_context=2
+            )
+            stemmer.apply_rules_diff(BulStemmerTest.RULES_2_PATH, new_path)
+            expected = BulStemmer.from_file(new_path, min_freq=2, left_context=2)
+
+        for (word, _, _) in BulStemmer.parse_rules(old_rules + new_rules):
+            for token in (word, "по" + word, word + "та"):
+                self.assertEqual(expected.stem(token), stemmer.stem(token))
+
+    def test_reload_rules(self):
+        stemmer = BulStemmer.from_file(
+            BulStemmerTest.RULES_1_PATH, min_freq=2, left_context=2
+        )
+        stemmer.enable_cache()
+        tokens = ["вероятен", "вторият", "случаите", "годишен", "продължителен"]
+        old_stems = stemmer.stem_many(tokens)
+        new_stems = BulStemmer.from_file(
+            BulStemmerTest.RULES_3_PATH, min_freq=2, left_context=2
+        ).stem_many(tokens)
+        self.assertNotEqual(old_stems, new_stems)
+
+        # Each concurrent lookup sees either the old or the new rules.
+        stop = threading.Event()
+        mixed = []
+
+        def stem_concurrently():
+            while not stop.is_set():
+                for (token, old_stem, new_stem) in zip(tokens, old_stems, new_stems):
+                    if stemmer.stem(token) not in (old_stem, new_stem):
+                        mixed.append(token)
+
+        threads = [threading.Thread(target=stem_concurrently) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        try:
+            future = stemmer.reload_rules(BulStemmerTest.RULES_3_PATH, background=True)
+            self.assertIsNone(future.result())
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual([], mixed)
+        self.assertEqual(new_stems, stemmer.stem_many(tokens))
+
+    def test_hash_backend(self):
+        for (left_context, rules_path) in enumerate(
+            (self.RULES_1_PATH, self.RULES_2_PATH, self.RULES_3_PATH), start=1
+        ):
+            trie = BulStemmer.from_file(
+                rules_path, min_freq=1, left_context=left_context
+            )
+            table = BulStemmer.from_file(
+                rules_path, min_freq=1, left_context=left_context, backend="hash"
+            )
+            self.assertIsInstance(table._stem_rules, BulStemmer.SuffixHash)
+
+            with open(str(rules_path), "r", encoding="utf-8") as rules_stream:
+                words = [word for (word, _, _) in BulStemmer.parse_rules(rules_stream)]
+
+            for word in words:
+                for token in (word, "по" + word, word + "та", word.upper()):
+                    for min_freq in (None, 5):
+                        self.assertEqual(
+                            trie.stem(token, min_freq), table.stem(token, min_freq)
+                        )
+
+    def test_hash_backend_duplicates(self):
+        rules = ["ой ==> о 10", "ой ==> ой 3", "ой ==> х 20", "ой ==> у 5", "й ==> и 4"]
+        for min_freq in range(0, 22):
+            trie = BulStemmer(rules, min_freq, left_context=0, allow_duplicates=True)
+            table = BulStemmer(
+                rules, min_freq, left_context=0, allow_duplicates=True, backend="hash"
+            )
+            for token in ("порой", "той", "край"):
+                self.assertEqual(trie.stem(token), table.stem(token))
+
+        with self.assertRaises(ValueError):
+            BulStemmer(rules, backend="hash")
+        with self.assertRaises(ValueError):
+            BulStemmer(rules, backend="btree")
+
+    def test_hash_backend_update_rules(self):
+        stemmer = BulStemmer(
+            ["ите ==> и 5", "ата ==> а 5"], min_freq=2, left_context=1, backend="hash"
+        )
+        stats = stemmer.update_rules(["ата ==> ат 4", "ища ==> ищ 3"], ["ите"])
+        self.assertEqual({"added": 1, "updated": 1, "removed": 1, "dropped": 0}, stats)
+        self.assertEqual("градат", stemmer.stem("градата"))
+        self.assertEqual("градите", stemmer.stem("градите"))
+        self.assertEqual("огнищ", stemmer.stem("огнища"))
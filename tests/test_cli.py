@@ -0,0 +1,79 @@
+# coding=utf-8
+
+import pathlib
+import shutil
+import tempfile
+import unittest
+
+from bulstem import lexicon
+from bulstem.__main__ import main
+
+
+class CliTest(unittest.TestCase):
+    TEXT = (
+        "Има първи вероятен случай на атипична пневмония в България.\n"
+        "\n"
+        "Става дума за 33-годишен пациент!"
+    )
+
+    def setUp(self):
+        self.tmp_dir = pathlib.Path(tempfile.mkdtemp())
+        self.output_path = self.tmp_dir / "output.txt"
+
+    def tearDown(self):
+        shutil.rmtree(str(self.tmp_dir))
+
+    def write_input(self, name: str, text: str) -> str:
+        path = self.tmp_dir / name
+        path.write_text(text, encoding="utf-8")
+        return str(path)
+
+    def run_main(self, *args) -> str:
+        main(
+            ["-r", "stem-context-2", "--left-context", "2", "-o", str(self.output_path)]
+            + list(args)
+        )
+        return self.output_path.read_text(encoding="utf-8")
+
+    def test_text(self):
+        input_path = self.write_input("input.txt", CliTest.TEXT)
+        self.assertEqual(
+            "има първ вероят случа на атипич пневмони в българ.\n\nстава дума за 33-годиш пациент!",
+            self.run_main(input_path),
+        )
+
+    def test_multiple_inputs(self):
+        input_path = self.write_input("input.txt", CliTest.TEXT + "\n")
+        expected = self.run_main(input_path)
+        self.assertEqual(expected * 2, self.run_main(input_path, input_path))
+        self.assertEqual(
+            expected * 2, self.run_main("--workers", "2", input_path, input_path)
+        )
+
+    def test_tokens(self):
+        input_path = self.write_input("tokens.txt", "вероятен\n Случай \n\nоставката")
+        self.assertEqual(
+            "вероят\nслуча\n\nоставк\n", self.run_main("--tokens", input_path)
+        )
+
+    def test_lexicon(self):
+        input_path = self.write_input("input.txt", CliTest.TEXT)
+        expected = self.run_main(input_path)
+
+        lexicon_path = str(self.tmp_dir / "words.lex")
+        lexicon.main(
+            [
+                self.write_input("words.txt", "вероятен\nслучай\n"),
+                "-o",
+                lexicon_path,
+                "-r",
+                "stem-context-2",
+                "--left-context",
+                "2",
+            ]
+        )
+        self.assertEqual(expected, self.run_main("--lexicon", lexicon_path, input_path))
+        self.assertEqual(
+            expected,
+            self.run_main("--backend", "hash", "--lexicon", lexicon_path, input_path),
+        )
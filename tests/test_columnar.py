@@ -0,0 +1,93 @@
+# coding=utf-8
+
+import sys
+import unittest
+from unittest import mock
+
+from bulstem.stem import BulStemmer
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+
+class StemColumnTest(unittest.TestCase):
+    TOKENS = ["вероятен", "Вероятен", "случай", "вероятни", "този"]
+
+    @classmethod
+    def setUpClass(cls):
+        cls.stemmer = BulStemmer.from_file("stem-context-2", min_freq=2, left_context=2)
+        cls.expected = [cls.stemmer.stem(token) for token in cls.TOKENS]
+
+    @unittest.skipUnless(np, "numpy is not installed")
+    def test_numpy(self):
+        for dtype in (str, object):
+            stems = self.stemmer.stem_column(np.array(self.TOKENS, dtype=dtype))
+            self.assertEqual(np.dtype(dtype).kind, stems.dtype.kind)
+            self.assertEqual(self.expected, stems.tolist())
+
+        stems = self.stemmer.stem_column(np.array(self.TOKENS[:4]).reshape(2, 2))
+        self.assertEqual((2, 2), stems.shape)
+        self.assertEqual(self.expected[:4], stems.ravel().tolist())
+
+        with self.assertRaises(TypeError):
+            self.stemmer.stem_column(np.arange(3))
+
+    @unittest.skipUnless(np, "numpy is not installed")
+    def test_numpy_missing(self):
+        column = np.array([None] + self.TOKENS + [float("nan")], dtype=object)
+        stems = self.stemmer.stem_column(column)
+        self.assertEqual(object, stems.dtype)
+        self.assertEqual([None] + self.expected + [None], stems.tolist())
+
+        # The values are factorized without pandas, too.
+        with mock.patch.dict(sys.modules, {"pandas": None}):
+            stems = self.stemmer.stem_column(column.reshape(1, -1))
+        self.assertEqual([[None] + self.expected + [None]], stems.tolist())
+
+        stems = self.stemmer.stem_column(np.array([[None, "случай"]], dtype=object))
+        self.assertEqual([[None, self.expected[2]]], stems.tolist())
+
+        stems = self.stemmer.stem_column(np.array([None, None], dtype=object))
+        self.assertEqual([None, None], stems.tolist())
+
+    @unittest.skipUnless(pa, "pyarrow is not installed")
+    def test_arrow(self):
+        stems = self.stemmer.stem_column(pa.array(self.TOKENS + [None]))
+        self.assertTrue(pa.types.is_dictionary(stems.type))
+        self.assertEqual(self.expected + [None], stems.to_pylist())
+        self.assertEqual(len(set(self.expected)), len(stems.dictionary))
+
+        chunked = pa.chunked_array([self.TOKENS[:2], self.TOKENS[2:]])
+        self.assertEqual(self.expected, self.stemmer.stem_column(chunked).to_pylist())
+
+        encoded = pa.array(self.TOKENS).dictionary_encode()
+        self.assertEqual(self.expected, self.stemmer.stem_column(encoded).to_pylist())
+
+    @unittest.skipUnless(pd, "pandas is not installed")
+    def test_pandas(self):
+        column = pd.Series(self.TOKENS + [None], index=list("abcdef"), name="tok")
+        stems = self.stemmer.stem_column(column)
+
+        self.assertEqual("category", stems.dtype.name)
+        self.assertEqual("tok", stems.name)
+        self.assertEqual(list("abcdef"), list(stems.index))
+        self.assertEqual(self.expected, list(stems[:-1]))
+        self.assertTrue(pd.isna(stems.iloc[-1]))
+
+        self.assertEqual(0, len(self.stemmer.stem_column(pd.Series([], dtype=object))))
+
+    def test_unsupported(self):
+        with self.assertRaises(TypeError):
+            self.stemmer.stem_column(self.TOKENS)
@@ -0,0 +1,210 @@
+# coding=utf-8
+
+import pathlib
+import pickle
+import shutil
+import tempfile
+import unittest
+
+import bulstem
+from bulstem import index
+from bulstem.stem import BulStemmer
+
+BULSTEM_DIR = pathlib.Path(bulstem.__file__).parent
+
+
+class IndexTest(unittest.TestCase):
+    RULES_2_PATH = BULSTEM_DIR / "stemrules" / "stem_rules_context_2_utf8.txt"
+
+    def setUp(self):
+        self.tmp_dir = pathlib.Path(tempfile.mkdtemp())
+        self.rules_path = self.tmp_dir / "rules.txt"
+        shutil.copy(str(IndexTest.RULES_2_PATH), str(self.rules_path))
+
+    def tearDown(self):
+        shutil.rmtree(str(self.tmp_dir))
+
+    def read_words(self):
+        with open(str(self.rules_path), "r", encoding="utf-8") as rules_stream:
+            return [line.split()[0] for line in rules_stream]
+
+    def test_compile_same_stems(self):
+        index_path = index.compile_rules(str(self.rules_path), min_freq=2)
+        self.assertEqual(index.default_index_path(self.rules_path, 2), index_path)
+
+        with open(str(self.rules_path), "r", encoding="utf-8") as rules_stream:
+            expected = BulStemmer(rules_stream, min_freq=2, left_context=2)
+        stemmer = BulStemmer.from_index(
+            index_path, str(self.rules_path), left_context=2
+        )
+
+        for word in self.read_words():
+            for token in (word, "по" + word, word + "та"):
+                self.assertEqual(expected.stem(token), stemmer.stem(token))
+
+    def test_from_file_uses_index(self):
+        index.compile_rules(str(self.rules_path), min_freq=2)
+        stemmer = BulStemmer.from_file(str(self.rules_path), min_freq=2, left_context=2)
+        self.assertEqual("вероят", stemmer.stem("вероятен"))
+
+    def test_stale_index(self):
+        index_path = index.compile_rules(str(self.rules_path), min_freq=2)
+        with open(str(self.rules_path), "a", encoding="utf-8") as rules_stream:
+            rules_stream.write("\n")
+
+        with self.assertRaises(ValueError):
+            BulStemmer.from_index(index_path, str(self.rules_path))
+
+        # from_file falls back to parsing the rules
+        stemmer = BulStemmer.from_file(str(self.rules_path), min_freq=2, left_context=2)
+        self.assertEqual("вероят", stemmer.stem("вероятен"))
+
+    def test_allow_duplicates(self):
+        self.rules_path.write_text("ой ==> о 10\nой ==> у 5\n", encoding="utf-8")
+        index_path = index.compile_rules(
+            str(self.rules_path), min_freq=2, allow_duplicates=True
+        )
+        self.assertTrue(index.read_index(index_path).allow_duplicates)
+
+        for memory_map in (False, True):
+            with self.assertRaises(ValueError):
+                BulStemmer.from_index(
+                    index_path, memory_map=memory_map, allow_duplicates=False
+                )
+            stemmer = BulStemmer.from_index(
+                index_path, left_context=0, memory_map=memory_map, allow_duplicates=True
+            )
+            self.assertEqual("пору", stemmer.stem("порой"))
+            self.assertEqual("поро", stemmer.stem("порой", min_freq=6))
+
+        # from_file falls back to parsing the rules, which holds duplicates.
+        with self.assertRaises(ValueError):
+            BulStemmer.from_file(str(self.rules_path), min_freq=2, left_context=0)
+        stemmer = BulStemmer.from_file(
+            str(self.rules_path), min_freq=2, left_context=0, allow_duplicates=True
+        )
+        self.assertEqual("пору", stemmer.stem("порой"))
+
+        self.rules_path.write_text("ой ==> о 10\n", encoding="utf-8")
+        index_path = index.compile_rules(str(self.rules_path), min_freq=2)
+        self.assertFalse(index.read_index(index_path).allow_duplicates)
+        self.assertFalse(index.MappedSuffixTrie(index_path).allow_duplicates)
+
+        # An index without duplicates suits the callers which allow them, too.
+        for memory_map in (False, True):
+            stemmer = BulStemmer.from_index(
+                index_path, left_context=0, memory_map=memory_map, allow_duplicates=True
+            )
+            self.assertEqual("поро", stemmer.stem("порой"))
+        # from_file maps the index, instead of parsing the rules.
+        stemmer = BulStemmer.from_file(
+            str(self.rules_path), min_freq=2, allow_duplicates=True, memory_map=True
+        )
+        self.assertIsInstance(stemmer._stem_rules, index.MappedSuffixTrie)
+
+    def test_invalid_index(self):
+        index_path = self.tmp_dir / "rules.min2.idx"
+        index_path.write_bytes(b"not an index")
+        with self.assertRaises(ValueError):
+            BulStemmer.from_index(index_path)
+
+    def test_bundled_indexes(self):
+        for name, file_name in BulStemmer.RULES_PRE_DEF_PATH.items():
+            rules_path = BULSTEM_DIR / "stemrules" / file_name
+            stemmer = BulStemmer.from_index(
+                index.default_index_path(rules_path, 2), name
+            )
+            self.assertEqual(2, stemmer._min_freq)
+
+    def test_memory_map_same_stems(self):
+        index_path = index.compile_rules(str(self.rules_path), min_freq=2)
+        expected = BulStemmer.from_index(index_path, left_context=2)
+        stemmer = BulStemmer.from_index(
+            index_path, str(self.rules_path), left_context=2, memory_map=True
+        )
+        self.assertIsInstance(stemmer._stem_rules, index.MappedSuffixTrie)
+
+        for word in self.read_words():
+            for token in (word, "по" + word, word + "та"):
+                self.assertEqual(expected.stem(token), stemmer.stem(token))
+
+    def test_memory_map_pickle(self):
+        index.compile_rules(str(self.rules_path), min_freq=2)
+        stemmer = BulStemmer.from_file(
+            str(self.rules_path), left_context=2, memory_map=True
+        )
+        stemmer = pickle.loads(pickle.dumps(stemmer))
+        self.assertIsInstance(stemmer._stem_rules, index.MappedSuffixTrie)
+        self.assertEqual("вероят", stemmer.stem("вероятен"))
+
+    def test_hash_backend(self):
+        index_path = index.compile_rules(str(self.rules_path), min_freq=2)
+        expected = BulStemmer.from_file(str(self.rules_path), left_context=2)
+        stemmer = BulStemmer.from_index(
+            index_path, str(self.rules_path), left_context=2, backend="hash"
+        )
+        self.assertIsInstance(stemmer._stem_rules, BulStemmer.SuffixHash)
+
+        for word in self.read_words():
+            for token in (word, "по" + word, word + "та"):
+                self.assertEqual(expected.stem(token), stemmer.stem(token))
+
+    def test_memory_map_reload(self):
+        index.compile_rules(str(self.rules_path), min_freq=2)
+        stemmer = BulStemmer.from_file(
+            str(self.rules_path), left_context=2, memory_map=True
+        )
+        with self.assertRaises(ValueError):
+            stemmer.update_rules(["ен ==> 5"])
+
+        with open(str(self.rules_path), "a", encoding="utf-8") as rules_stream:
+            rules_stream.write("\n")
+        index.compile_rules(str(self.rules_path), min_freq=2)
+        stemmer.reload_rules(str(self.rules_path))
+        self.assertIsInstance(stemmer._stem_rules, index.MappedSuffixTrie)
+        self.assertEqual("вероят", stemmer.stem("вероятен"))
+
+    def test_recompile_mapped(self):
+        index.compile_rules(str(self.rules_path), min_freq=2)
+        stemmer = BulStemmer.from_file(
+            str(self.rules_path), left_context=2, memory_map=True
+        )
+        self.assertIsInstance(stemmer._stem_rules, index.MappedSuffixTrie)
+        words = self.read_words()
+        expected = stemmer.stem_many(words)
+
+        # The index is replaced, while the stemmer keeps the previous one mapped.
+        with open(str(self.rules_path), "r", encoding="utf-8") as rules_stream:
+            lines = rules_stream.readlines()
+        with open(str(self.rules_path), "w", encoding="utf-8") as rules_stream:
+            rules_stream.writelines(lines[::3])
+        index.compile_rules(str(self.rules_path), min_freq=2)
+
+        self.assertEqual(expected, stemmer.stem_many(words))
+        self.assertEqual([], list(self.tmp_dir.glob("*.tmp")))
+
+    def test_query_min_freq(self):
+        rules = [
+            "ой ==> о 10",
+            "ой ==> ой 3",
+            "ой ==> х 20",
+            "ой ==> у 5",
+            "рой ==> р 7",
+        ]
+        self.rules_path.write_text("\n".join(rules), encoding="utf-8")
+        index_path = index.compile_rules(
+            str(self.rules_path), min_freq=0, allow_duplicates=True
+        )
+
+        for memory_map in (False, True):
+            stemmer = BulStemmer.from_index(
+                index_path, left_context=0, memory_map=memory_map
+            )
+            for min_freq in range(0, 22):
+                expected = BulStemmer(
+                    rules, min_freq=min_freq, left_context=0, allow_duplicates=True
+                )
+                for token in ("порой", "пой", "той"):
+                    self.assertEqual(
+                        expected.stem(token), stemmer.stem(token, min_freq)
+                    )
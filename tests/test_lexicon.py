@@ -0,0 +1,167 @@
+# coding=utf-8
+
+import pathlib
+import pickle
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import bulstem
+from bulstem import index, lexicon
+from bulstem.stem import BulStemmer
+
+BULSTEM_DIR = pathlib.Path(bulstem.__file__).parent
+
+
+class LexiconTest(unittest.TestCase):
+    RULES_2_PATH = BULSTEM_DIR / "stemrules" / "stem_rules_context_2_utf8.txt"
+
+    def setUp(self):
+        self.tmp_dir = pathlib.Path(tempfile.mkdtemp())
+        self.lexicon_path = self.tmp_dir / "words.lex"
+        self.stemmer = BulStemmer.from_file(
+            LexiconTest.RULES_2_PATH, min_freq=2, left_context=2
+        )
+        with open(str(LexiconTest.RULES_2_PATH), "r", encoding="utf-8") as stream:
+            self.words = [word for (word, _, _) in BulStemmer.parse_rules(stream)]
+
+    def tearDown(self):
+        shutil.rmtree(str(self.tmp_dir))
+
+    def test_same_stems(self):
+        words = [w for word in self.words[::2] for w in (word, "по" + word)]
+        size = lexicon.write_lexicon(self.stemmer, words, self.lexicon_path)
+        self.assertEqual(len(set(words)), size)
+
+        stems = lexicon.Lexicon(self.lexicon_path)
+        self.assertEqual(size, len(stems))
+        for word in words:
+            self.assertEqual(self.stemmer.stem(word), stems.get(word))
+            self.assertEqual(self.stemmer.stem(word), stems.get(word.upper()))
+        for word in self.words[1::2]:
+            self.assertNotIn(word + "щщ", stems)
+
+    def test_fallback(self):
+        expected = [self.stemmer.stem(word) for word in self.words[:200]]
+        lexicon.write_lexicon(self.stemmer, self.words[:100], self.lexicon_path)
+
+        self.assertIsNone(self.stemmer.lexicon_info())
+        self.stemmer.use_lexicon(str(self.lexicon_path))
+        self.assertEqual(expected, self.stemmer.stem_many(self.words[:200]))
+
+        info = self.stemmer.lexicon_info()
+        self.assertEqual(100, info["hits"])
+        self.assertEqual(100, info["misses"])
+        self.assertAlmostEqual(0.5, info["hit_rate"])
+        self.assertEqual(100, info["size"])
+
+        # The lexicon holds only the stems for the default min_freq.
+        self.assertEqual(self.stemmer.stem(self.words[0]), expected[0])
+        self.stemmer.stem(self.words[0], min_freq=5)
+        self.assertEqual(101, self.stemmer.lexicon_info()["hits"])
+
+        stemmer = pickle.loads(pickle.dumps(self.stemmer))
+        self.assertEqual(expected, stemmer.stem_many(self.words[:200]))
+
+        # The lexicon is out of date, once the rules change.
+        self.stemmer.update_rules([], self.words[:1])
+        self.assertIsNone(self.stemmer.lexicon_info())
+
+    def test_invalid_lexicon(self):
+        lexicon.write_lexicon(self.stemmer, self.words, self.lexicon_path)
+        stemmer = BulStemmer.from_file(
+            LexiconTest.RULES_2_PATH, min_freq=2, left_context=3
+        )
+        with self.assertRaises(ValueError):
+            stemmer.use_lexicon(self.lexicon_path)
+
+        # Same min_freq and left_context, but different rules.
+        stemmer = BulStemmer.from_file("stem-context-3", min_freq=2, left_context=2)
+        with self.assertRaises(ValueError):
+            stemmer.use_lexicon(self.lexicon_path)
+
+        with open(str(self.lexicon_path), "r+b") as stream:
+            stream.truncate(100)
+        with self.assertRaises(ValueError):
+            lexicon.Lexicon(self.lexicon_path)
+
+    def test_rebuild_mapped(self):
+        lexicon.write_lexicon(self.stemmer, self.words, self.lexicon_path)
+        stems = lexicon.Lexicon(self.lexicon_path)
+        expected = [stems.get(word) for word in self.words]
+
+        lexicon.write_lexicon(self.stemmer, self.words[:10], self.lexicon_path)
+        self.assertEqual(expected, [stems.get(word) for word in self.words])
+        self.assertEqual(10, len(lexicon.Lexicon(self.lexicon_path)))
+
+    def test_empty_lexicon(self):
+        self.assertEqual(0, lexicon.write_lexicon(self.stemmer, [], self.lexicon_path))
+        self.assertIsNone(lexicon.Lexicon(self.lexicon_path).get("вероятен"))
+
+    def test_compile_lexicon(self):
+        words_path = self.tmp_dir / "words.txt"
+        with open(str(words_path), "w", encoding="utf-8") as stream:
+            stream.write("Вероятен\nслучай\n\nвероятен\n")
+
+        lexicon.main(
+            [
+                str(words_path),
+                "-o",
+                str(self.lexicon_path),
+                "--rules",
+                str(LexiconTest.RULES_2_PATH),
+                "--left-context",
+                "2",
+            ]
+        )
+        stems = lexicon.Lexicon(self.lexicon_path)
+        self.assertEqual(2, len(stems))
+        self.assertEqual("вероят", stems.get("вероятен"))
+
+    def test_rules_digest(self):
+        digest = self.stemmer.rules_digest()
+        self.assertEqual(32, len(digest))
+        for backend in BulStemmer.BACKENDS:
+            stemmer = BulStemmer.from_file(
+                LexiconTest.RULES_2_PATH, min_freq=2, left_context=2, backend=backend
+            )
+            self.assertEqual(digest, stemmer.rules_digest())
+
+        stemmer = BulStemmer.from_file(
+            LexiconTest.RULES_2_PATH, min_freq=2, left_context=2, memory_map=True
+        )
+        self.assertIsInstance(stemmer._stem_rules, index.MappedSuffixTrie)
+        self.assertEqual(digest, stemmer.rules_digest())
+
+        lexicon.write_lexicon(self.stemmer, self.words[:10], self.lexicon_path)
+        self.assertEqual(digest, lexicon.Lexicon(self.lexicon_path).digest)
+
+        # The stemmers loaded from a rules file are identified without listing their rules.
+        with mock.patch.object(
+            BulStemmer.SuffixTrie, "rules", side_effect=AssertionError
+        ), mock.patch.object(
+            index.MappedSuffixTrie, "rules", side_effect=AssertionError
+        ):
+            for memory_map in (False, True):
+                stemmer = BulStemmer.from_file(
+                    LexiconTest.RULES_2_PATH,
+                    min_freq=2,
+                    left_context=2,
+                    memory_map=memory_map,
+                )
+                stemmer.use_lexicon(self.lexicon_path)
+            stemmer.reload_rules(LexiconTest.RULES_2_PATH)
+            self.assertEqual(digest, stemmer.rules_digest())
+
+            # Parsed, since there is no compiled index next to the copy.
+            rules_path = self.tmp_dir / "rules.txt"
+            shutil.copy(str(LexiconTest.RULES_2_PATH), str(rules_path))
+            stemmer = BulStemmer.from_file(rules_path, min_freq=2, left_context=2)
+            self.assertEqual(digest, stemmer.rules_digest())
+
+        # The rules are changed, so is their digest, and the lexicon no longer matches them.
+        self.stemmer.update_rules([], self.words[:1])
+        self.assertNotEqual(digest, self.stemmer.rules_digest())
+        with self.assertRaises(ValueError):
+            self.stemmer.use_lexicon(self.lexicon_path)
@@ -0,0 +1,94 @@
+# coding=utf-8
+
+import unittest
+
+from bulstem.metrics import StemmerMetrics
+from bulstem.stem import BulStemmer
+
+
+class StemmerMetricsTest(unittest.TestCase):
+    RULES = ["ой ==> о 10", "рой ==> р 1", "ове ==> ов 5", "not a rule"]
+
+    def test_load(self):
+        metrics = StemmerMetrics()
+        BulStemmer(
+            StemmerMetricsTest.RULES, min_freq=2, left_context=0, metrics=metrics
+        )
+
+        result = metrics.to_dict()
+        self.assertEqual(4, result["lines_parsed"])
+        self.assertEqual(2, result["rules_kept"])
+        self.assertEqual(1, result["rules_dropped"])
+        self.assertGreater(result["load_seconds"], 0)
+
+    def test_lookups(self):
+        metrics = StemmerMetrics()
+        stemmer = BulStemmer(
+            StemmerMetricsTest.RULES, min_freq=2, left_context=0, metrics=metrics
+        )
+        self.assertIs(metrics, stemmer.metrics)
+
+        self.assertEqual("поро", stemmer.stem("порой"))
+        self.assertEqual("поро", stemmer.stem("Порой"))
+        self.assertEqual("градов", stemmer.stem("градове"))
+        self.assertEqual("град", stemmer.stem("град"))
+
+        result = metrics.to_dict()
+        self.assertEqual(4, result["lookups"])
+        self.assertEqual(3, result["matched"])
+        self.assertEqual(1, result["unchanged"])
+        self.assertEqual({"ой ==> о": 2, "ове ==> ов": 1}, result["rule_hits"])
+        # "рой" is dropped, so "порой" reaches depth 2, "градове" 3 and "град" 0
+        self.assertEqual({2: 2, 3: 1, 0: 1}, result["depths"])
+
+    def test_flush(self):
+        exported = []
+        metrics = StemmerMetrics(callback=exported.append)
+        stemmer = BulStemmer.from_file(
+            "stem-context-2", min_freq=2, left_context=2, metrics=metrics
+        )
+        stemmer.stem("вероятен")
+
+        result = metrics.flush()
+        self.assertEqual([result], exported)
+        self.assertEqual(1, result["lookups"])
+        self.assertEqual(0, metrics.to_dict()["lookups"])
+        self.assertGreater(metrics.to_dict()["load_seconds"], 0)
+
+        # The rules are loaded from the compiled index, instead of being parsed.
+        expected = StemmerMetrics()
+        with open(
+            BulStemmer.resolve_path("stem-context-2"), "r", encoding="utf-8"
+        ) as stream:
+            BulStemmer(stream, min_freq=2, left_context=2, metrics=expected)
+        self.assertEqual(0, result["lines_parsed"])
+        self.assertEqual(0, result["rules_dropped"])
+        self.assertEqual(expected.to_dict()["rules_kept"], result["rules_kept"])
+        self.assertGreater(result["rules_kept"], 0)
+
+        mapped = StemmerMetrics()
+        BulStemmer.from_file(
+            "stem-context-2",
+            min_freq=2,
+            left_context=2,
+            memory_map=True,
+            metrics=mapped,
+        )
+        self.assertEqual(result["rules_kept"], mapped.to_dict()["rules_kept"])
+
+    def test_same_stems(self):
+        tokens = ["вероятен", "случай", "оставката", "Пневмония", "този", "сзо", "33"]
+        for memory_map in (False, True):
+            stemmer = BulStemmer.from_file(
+                "stem-context-2", left_context=2, memory_map=memory_map
+            )
+            instrumented = BulStemmer.from_file(
+                "stem-context-2",
+                left_context=2,
+                memory_map=memory_map,
+                metrics=StemmerMetrics(),
+            )
+            self.assertEqual(
+                [stemmer.stem(token) for token in tokens],
+                [instrumented.stem(token) for token in tokens],
+            )
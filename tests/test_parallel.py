@@ -0,0 +1,48 @@
+# coding=utf-8
+
+import unittest
+
+from bulstem.parallel import stem_corpus
+from bulstem.stem import BulStemmer
+
+
+class ParallelTest(unittest.TestCase):
+    LINES = [
+        "Има първи вероятен случай на атипична пневмония в България.\n",
+        "\n",
+        "Става дума за 33-годишен пациент, който на 16 април е пристигнал в България.\n",
+        "Точната диагнозата обаче не може да бъде установена в България!",
+    ]
+
+    @classmethod
+    def setUpClass(cls):
+        cls.stemmer = BulStemmer.from_file("stem-context-2", min_freq=2, left_context=2)
+
+    def test_single_worker(self):
+        stats = {}
+        stemmed = list(
+            stem_corpus(self.stemmer, iter(self.LINES), workers=1, stats=stats)
+        )
+
+        self.assertEqual([self.stemmer.stem_text(line) for line in self.LINES], stemmed)
+        self.assertEqual(
+            "става дума за 33-годиш пациент, койт на 16 апр е пристигн в българ.\n",
+            stemmed[2],
+        )
+        self.assertEqual(len(self.LINES), stats["lines"])
+        self.assertEqual(33, stats["tokens"])
+
+    def test_workers_keep_order(self):
+        lines = self.LINES * 50
+        stats = {}
+        stemmed = list(
+            stem_corpus(self.stemmer, lines, workers=2, chunk_size=3, stats=stats)
+        )
+
+        self.assertEqual([self.stemmer.stem_text(line) for line in lines], stemmed)
+        self.assertEqual(len(lines), stats["lines"])
+        self.assertEqual(33 * 50, stats["tokens"])
+        self.assertGreater(stats["tokens_per_second"], 0)
+
+    def test_empty(self):
+        self.assertEqual([], list(stem_corpus(self.stemmer, [], workers=2)))
@@ -0,0 +1,75 @@
+# coding=utf-8
+
+import threading
+import unittest
+from unittest import mock
+
+from bulstem import registry
+from bulstem.stem import BulStemmer
+
+
+class RegistryTest(unittest.TestCase):
+    def setUp(self):
+        registry.evict()
+
+    def tearDown(self):
+        registry.evict()
+
+    def test_shared(self):
+        stemmer = registry.get_stemmer("stem-context-2", left_context=2)
+        self.assertIs(stemmer, registry.get_stemmer("stem-context-2", 2, 2))
+        self.assertIs(
+            stemmer,
+            registry.get_stemmer(BulStemmer.resolve_path("stem-context-2"), 2, 2),
+        )
+        self.assertIsNot(stemmer, registry.get_stemmer("stem-context-2", 2, 3))
+        self.assertEqual("вероят", stemmer.stem("вероятен"))
+
+    def test_concurrent(self):
+        stemmers = []
+        with mock.patch.object(
+            BulStemmer, "from_file", wraps=BulStemmer.from_file
+        ) as from_file:
+            threads = [
+                threading.Thread(target=lambda: stemmers.append(registry.get_stemmer()))
+                for _ in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(1, from_file.call_count)
+        self.assertEqual(8, len(stemmers))
+        for stemmer in stemmers:
+            self.assertIs(stemmers[0], stemmer)
+
+    def test_warm_up(self):
+        self.assertIsNone(registry.warm_up([("stem-context-1", 2, 1)]))
+        self.assertEqual(
+            [(BulStemmer.resolve_path("stem-context-1"), 2, 1, False)],
+            registry.loaded(),
+        )
+
+        future = registry.warm_up(background=True)
+        self.assertIsNone(future.result())
+        self.assertEqual(4, len(registry.loaded()))
+
+        # The defaults are warmed up with the same settings get_stemmer uses.
+        with mock.patch.object(BulStemmer, "from_file") as from_file:
+            for rules in BulStemmer.RULES_PRE_DEF_PATH:
+                registry.get_stemmer(rules)
+        from_file.assert_not_called()
+
+    def test_evict(self):
+        stemmer = registry.get_stemmer("stem-context-1", left_context=1)
+        registry.get_stemmer("stem-context-1", left_context=2)
+        registry.get_stemmer("stem-context-2", left_context=2)
+
+        self.assertEqual(2, registry.evict("stem-context-1"))
+        self.assertEqual(1, len(registry.loaded()))
+        self.assertIsNot(
+            stemmer, registry.get_stemmer("stem-context-1", left_context=1)
+        )
+        self.assertEqual(2, registry.evict())
+        self.assertEqual([], registry.loaded())
@@ -0,0 +1,148 @@
+# coding=utf-8
+
+import asyncio
+import json
+import pathlib
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from bulstem.server import StemClient, StemServer
+from bulstem.stem import BulStemmer
+
+
+class StemServerTest(unittest.TestCase):
+    TOKENS = ["вероятен", "случай", "Оставката", "този", "пневмония", "33", ""]
+
+    @classmethod
+    def setUpClass(cls):
+        cls.stemmer = BulStemmer.from_file("stem-context-2", min_freq=2, left_context=2)
+        cls.expected = cls.stemmer.stem_many(cls.TOKENS)
+
+    def setUp(self):
+        self.tmp_dir = pathlib.Path(tempfile.mkdtemp())
+        self.loop = asyncio.new_event_loop()
+        self.server = StemServer(self.stemmer)
+
+    def tearDown(self):
+        self.loop.run_until_complete(self.server.close())
+        self.loop.close()
+        shutil.rmtree(str(self.tmp_dir))
+
+    def run_async(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    async def concurrent_requests(self, client: StemClient):
+        requests = [self.TOKENS[i:] for i in range(len(self.TOKENS))] * 20
+        responses = await asyncio.gather(
+            *[client.stem_many(tokens) for tokens in requests]
+        )
+        for tokens, stems in zip(requests, responses):
+            self.assertEqual(self.stemmer.stem_many(tokens), stems)
+
+    def test_unix_socket(self):
+        path = str(self.tmp_dir / "bulstem.sock")
+        self.run_async(self.server.start_unix(path))
+
+        async def run():
+            async with StemClient(path, pool_size=2) as client:
+                self.assertEqual(self.expected, await client.stem_many(self.TOKENS))
+                self.assertEqual("вероят", await client.stem("вероятен"))
+                await self.concurrent_requests(client)
+
+        self.run_async(run())
+
+    def test_tcp(self):
+        server = self.run_async(self.server.start_tcp())
+        port = server.sockets[0].getsockname()[1]
+
+        async def run():
+            async with StemClient(port=port, pool_size=3) as client:
+                self.assertEqual(self.expected, await client.stem_many(self.TOKENS))
+                await self.concurrent_requests(client)
+
+        self.run_async(run())
+
+    def test_invalid_request(self):
+        server = self.run_async(self.server.start_tcp())
+        port = server.sockets[0].getsockname()[1]
+
+        async def run():
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(
+                '{"id": 7, "tokens": "not a list"}\n{"id": 8, "tokens": ["Той"]}\n'.encode()
+            )
+            response = json.loads((await reader.readline()).decode())
+            self.assertEqual(7, response["id"])
+            self.assertIn("error", response)
+            self.assertEqual(
+                {"id": 8, "stems": ["той"]},
+                json.loads((await reader.readline()).decode()),
+            )
+            writer.close()
+
+        self.run_async(run())
+
+    def test_client_requires_address(self):
+        with self.assertRaises(ValueError):
+            StemClient()
+
+    def test_dropped_connection(self):
+        server = self.run_async(self.server.start_tcp())
+        port = server.sockets[0].getsockname()[1]
+
+        async def run():
+            async with StemClient(port=port, pool_size=1) as client:
+                self.assertEqual(self.expected, await client.stem_many(self.TOKENS))
+
+                # Closing the server drops the connections of its clients.
+                await self.server.close()
+                for _ in range(2):
+                    with self.assertRaises(ConnectionError):
+                        await asyncio.wait_for(client.stem_many(self.TOKENS), 5)
+
+        self.run_async(run())
+
+    def test_closed_server(self):
+        self.run_async(self.server.start_tcp())
+        self.run_async(self.server.close())
+
+        with self.assertRaises(ConnectionError):
+            self.run_async(self.server.stem_many(self.TOKENS))
+        self.assertIsNone(self.server._batcher)
+
+        # The requests still in flight are dropped, instead of failing their tasks.
+        writer = mock.Mock()
+        request = '{"id": 1, "tokens": ["Той"]}'.encode("utf-8")
+        self.run_async(self.server._respond(request, writer))
+        writer.write.assert_not_called()
+
+    def test_reconnect(self):
+        path = str(self.tmp_dir / "bulstem.sock")
+        self.run_async(self.server.start_unix(path))
+
+        async def run():
+            async with StemClient(path, pool_size=2) as client:
+                self.assertEqual(self.expected, await client.stem_many(self.TOKENS))
+
+                await self.server.close()
+                for _ in range(3):
+                    with self.assertRaises(OSError):
+                        await asyncio.wait_for(client.stem_many(self.TOKENS), 5)
+
+                # The dropped connections are reopened, once the server is back.
+                await self.server.start_unix(path)
+                for _ in range(4):
+                    stems = await asyncio.wait_for(client.stem_many(self.TOKENS), 5)
+                    self.assertEqual(self.expected, stems)
+
+                # connect() replaces the pool, instead of extending it.
+                connections = list(client._connections)
+                await client.connect()
+                self.assertEqual(2, len(client._connections))
+                for connection in connections:
+                    self.assertTrue(connection.closed)
+                self.assertEqual(self.expected, await client.stem_many(self.TOKENS))
+
+        self.run_async(run())